@@ -0,0 +1,11 @@
+import os
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir,
+                        'tests', 'test_data')
+ARTICLE_FILE = os.path.join(DATA_DIR, 'habrahabr_article.txt')
+
+
+def read_article() -> str:
+    with open(ARTICLE_FILE) as f:
+        return f.read()
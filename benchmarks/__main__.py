@@ -0,0 +1,238 @@
+"""
+    Benchmark tokenizer, tagger, pattern matcher and literals scorer on
+    the bundled article and synthetic corpora of increasing size, save
+    results to JSON and compare them with results of other run:
+
+        python -m benchmarks --output new.json --compare old.json
+"""
+import re
+import sys
+import json
+import time
+import random
+import subprocess
+import argparse
+import platform
+import statistics
+import tracemalloc
+import typing as t
+
+import numpy as np
+
+from benchmarks import read_article
+from benchmarks.bench_import import measure_import
+from birchnlp.birch import Birch
+from birchnlp.pattern_matcher.pattern_matcher import compile_pattern
+from birchnlp.pos_tagger.pos_tagger import POSTagger
+from birchnlp.scorer import LiteralScorer
+from birchnlp.tokenizer import get_tokenizer
+from birchnlp.tokenizer.tokenizer import get_sentences_offsets
+
+
+STAGES = ['tokenize', 'tag', 'match', 'score']
+# Corpora sizes in article lengths, the first one is the article itself
+SCALES = [1, 4, 16]
+DOC_SENTENCES = 20
+PATTERN = "<ADJ>*<NOUN>+"
+PERCENTILES = [50, 90, 99]
+MAX_REGRESSION = 0.2
+SEED = 0
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+STARTUP_CODE = ("import time; start = time.perf_counter(); "
+                "from birchnlp.birch import Birch; Birch('Тест.'); "
+                "print(time.perf_counter() - start)")
+
+
+def make_corpus(article: str, scale: int, seed: int=SEED) -> t.List[str]:
+    """
+        Documents of article sentences, sampled with replacement, with
+        `scale` times as many sentences as the article has.
+    """
+    if scale == 1:
+        return [article]
+
+    sentences = [sent for sent in SENTENCE_END_RE.split(article) if sent]
+    rng = random.Random(seed)
+    sampled = rng.choices(sentences, k=scale * len(sentences))
+
+    return [" ".join(sampled[i: i + DOC_SENTENCES])
+            for i in range(0, len(sampled), DOC_SENTENCES)]
+
+
+def split_sentences(tokens: t.List[str],
+                    spaces: t.List[bool]) -> t.List[t.List[str]]:
+    bounds = [0] + get_sentences_offsets(tokens, spaces) + [len(tokens)]
+    return [tokens[start: stop] for start, stop in zip(bounds, bounds[1:])
+            if start < stop]
+
+
+def make_stages(texts: t.List[str]) -> t.Dict[str, t.List[t.Callable]]:
+    """
+        Calls of every stage for every document. Inputs of stages are
+        prepared beforehand, so only the stage itself is measured.
+    """
+    tokenize = get_tokenizer()
+    tagger = POSTagger()
+    matcher = compile_pattern(PATTERN)
+    scorer = LiteralScorer()
+
+    sents = [split_sentences(*tokenize(text)) for text in texts]
+    docs = [Birch(text) for text in texts]
+    literals = [doc.extract(matcher) for doc in docs]
+
+    return {
+        'tokenize': [lambda text=text: tokenize(text) for text in texts],
+        'tag': [lambda doc=doc: tagger.tag_many(doc) for doc in sents],
+        'match': [lambda doc=doc: matcher.findall(doc) for doc in docs],
+        'score': [lambda lits=lits: scorer.assign_scores(lits)
+                  for lits in literals],
+    }
+
+
+def bench_stage(calls: t.List[t.Callable], tokens_count: int,
+                repeat: int) -> t.Dict[str, float]:
+    for call in calls:
+        call()  # warm up caches
+
+    latencies = []
+    totals = []
+    for _ in range(repeat):
+        total = 0.
+        for call in calls:
+            start = time.perf_counter()
+            call()
+            latency = time.perf_counter() - start
+            latencies.append(latency)
+            total += latency
+        totals.append(total)
+
+    tracemalloc.start()
+    for call in calls:
+        call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {'tokens_per_sec': tokens_count / statistics.median(totals)}
+    for q, value in zip(PERCENTILES,
+                        np.percentile(latencies, PERCENTILES)):
+        result['p%d_ms' % q] = float(value) * 1000
+    result['peak_kb'] = peak / 1024
+
+    return result
+
+
+def measure_startup(repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c',
+                                          STARTUP_CODE])
+        timings.append(float(output))
+
+    return statistics.median(timings)
+
+
+def run(scales: t.List[int], repeat: int,
+        stages: t.List[str]=STAGES) -> dict:
+    article = read_article()
+    tokenize = get_tokenizer()
+
+    corpora = []
+    for scale in scales:
+        texts = make_corpus(article, scale)
+        tokens_count = sum(len(tokenize(text)[0]) for text in texts)
+        calls = make_stages(texts)
+
+        corpora.append({
+            'scale': scale,
+            'docs': len(texts),
+            'tokens': tokens_count,
+            'stages': {name: bench_stage(calls[name], tokens_count, repeat)
+                       for name in stages},
+        })
+
+    return {
+        'python': platform.python_version(),
+        'import_ms': statistics.median(
+            measure_import('birchnlp.birch', repeat)) * 1000,
+        'startup_ms': measure_startup(repeat) * 1000,
+        'corpora': corpora,
+    }
+
+
+def format_results(results: dict) -> str:
+    lines = ["import: %.2f ms, startup: %.2f ms" % (results['import_ms'],
+                                                    results['startup_ms']),
+             "%-6s %-9s %12s %10s %10s %10s %10s" % (
+                 "scale", "stage", "tokens/sec", "p50, ms", "p90, ms",
+                 "p99, ms", "peak, KB")]
+    for corpus in results['corpora']:
+        for name, stage in corpus['stages'].items():
+            lines.append("%-6d %-9s %12.0f %10.3f %10.3f %10.3f %10.1f" % (
+                corpus['scale'], name, stage['tokens_per_sec'],
+                stage['p50_ms'], stage['p90_ms'], stage['p99_ms'],
+                stage['peak_kb']))
+
+    return "\n".join(lines)
+
+
+def compare(results: dict, baseline: dict,
+            max_regression: float=MAX_REGRESSION) -> t.List[str]:
+    """
+        Stages with throughput, which dropped by more than
+        `max_regression` share of baseline one.
+    """
+    baseline_corpora = {corpus['scale']: corpus
+                        for corpus in baseline['corpora']}
+
+    regressions = []
+    for corpus in results['corpora']:
+        baseline_corpus = baseline_corpora.get(corpus['scale'])
+        if baseline_corpus is None:
+            continue
+
+        for name, stage in corpus['stages'].items():
+            if name not in baseline_corpus['stages']:
+                continue
+            old = baseline_corpus['stages'][name]['tokens_per_sec']
+            ratio = stage['tokens_per_sec'] / old
+            print("%-6d %-9s %8.2fx" % (corpus['scale'], name, ratio))
+            if ratio < 1 - max_regression:
+                regressions.append("%s on scale %d" % (name,
+                                                       corpus['scale']))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES)
+    parser.add_argument('--stages', nargs='+', choices=STAGES,
+                        default=STAGES)
+    parser.add_argument('--output', help="JSON file to save results")
+    parser.add_argument('--compare', help="JSON file of baseline results")
+    parser.add_argument('--max-regression', type=float,
+                        default=MAX_REGRESSION,
+                        help="fail if throughput drops by bigger share")
+    args = parser.parse_args()
+
+    results = run(args.scales, args.repeat, args.stages)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            sys.exit("Throughput regressions: " + ", ".join(regressions))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+    Measure import time of birchnlp modules in fresh interpreters:
+
+        python -m benchmarks.bench_import --max-ms 300
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import typing as t
+
+
+MODULES = ['birchnlp.tokenizer', 'birchnlp.birch']
+
+IMPORT_CODE = ("import time; start = time.perf_counter(); import {}; "
+               "print(time.perf_counter() - start)")
+
+
+def measure_import(module: str, repeat: int) -> t.List[float]:
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-c', IMPORT_CODE.format(module)])
+        timings.append(float(output))
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help="fail if median import time is bigger")
+    parser.add_argument('modules', nargs='*', default=MODULES)
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        median = statistics.median(measure_import(module, args.repeat)) * 1000
+        print(f"{module:>24}: {median:8.2f} ms")
+        if args.max_ms is not None and median > args.max_ms:
+            failed = True
+
+    if failed:
+        sys.exit(f"Import time exceeds {args.max_ms} ms")
+
+
+if __name__ == '__main__':
+    main()
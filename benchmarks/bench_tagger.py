@@ -0,0 +1,50 @@
+"""
+    Compare sparse and dense inference paths of POSTagger:
+
+        python -m benchmarks.bench_tagger --repeat 20
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks import read_article
+from birchnlp.pos_tagger.pos_tagger import DATA_DIR, POSTagger
+from birchnlp.tokenizer import get_tokenizer
+
+
+def bench(tagger: POSTagger, sents, repeat: int) -> float:
+    tagger.tag_many(sents)  # warm up features cache
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        tagger.tag_many(sents)
+
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--sent-len', type=int, default=20)
+    args = parser.parse_args()
+
+    tokens, _ = get_tokenizer()(read_article())
+    sents = [tokens[i: i + args.sent_len]
+             for i in range(0, len(tokens), args.sent_len)]
+
+    taggers = {'sparse': POSTagger(args.data_dir),
+               'dense': POSTagger(args.data_dir, dense=True)}
+
+    predictions = [tagger._predict(sents) for tagger in taggers.values()]
+    assert np.array_equal(*predictions), "dense path differs from sparse"
+
+    for name, tagger in taggers.items():
+        elapsed = bench(tagger, sents, args.repeat)
+        print(f"{name:>8}: {elapsed * 1000:8.2f} ms/iter, "
+              f"{len(tokens) / elapsed:10.0f} tokens/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+    Compare chunk by chunk and single regex scan tokenization engines:
+
+        python -m benchmarks.bench_tokenizer --repeat 20
+"""
+import argparse
+import time
+
+from benchmarks import read_article
+from birchnlp.tokenizer import get_tokenizer
+from birchnlp.tokenizer.config import TokenizingConfig
+
+
+class ChunkTokenizingConfig(TokenizingConfig):
+    TOKENIZE_RE = None
+
+
+def bench(tokenize, text: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        tokenize(text)
+
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--scale', type=int, default=10,
+                        help="article copies in benchmarked text")
+    args = parser.parse_args()
+
+    text = read_article() * args.scale
+    tokenizers = {'chunks': get_tokenizer(ChunkTokenizingConfig()),
+                  'regex': get_tokenizer(TokenizingConfig())}
+
+    outputs = [tokenize(text) for tokenize in tokenizers.values()]
+    assert outputs[0] == outputs[1], "tokenization engines differ"
+
+    tokens_count = len(outputs[0][0])
+    for name, tokenize in tokenizers.items():
+        elapsed = bench(tokenize, text, args.repeat)
+        print(f"{name:>8}: {elapsed * 1000:8.2f} ms/iter, "
+              f"{tokens_count / elapsed:10.0f} tokens/sec")
+
+
+if __name__ == '__main__':
+    main()
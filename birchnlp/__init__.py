@@ -0,0 +1,7 @@
+def __getattr__(name):
+    # Imported lazily, so tokenizer-only users don't pay for whole package
+    if name == "pipe":
+        from birchnlp.pipeline import pipe
+        return pipe
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
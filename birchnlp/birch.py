@@ -1,99 +1,339 @@
 import typing as t
+import mmap
+import itertools
+
+import numpy as np
 
 from birchnlp.tokenizer import get_tokenizer
+from birchnlp.tokenizer.tokenizer import get_sentences_offsets
 from birchnlp.tokenizer.config import TokenizingConfig
-from birchnlp.pos_tagger import POSTagger
-from birchnlp.pattern_matcher import PatternMatcher
+from birchnlp.pos_tagger import POSTag
+from birchnlp.pattern_matcher import (
+    PatternMatcher, PatternSet, compile_pattern)
 from birchnlp.schemes import Token
-from birchnlp.utils import get_stem_func
+from birchnlp.storage import TokenStorage
+from birchnlp.cache import AnalysisCache
+from birchnlp import models
 
 
 BirchType = t.TypeVar("BirchType", bound="Birch")
 
 
-class Birch:
+DEFAULT_BATCH_SIZE = 256
 
-    tokens = None
+
+class Birch:
+    """
+        Tokenized and tagged document. Tokens are kept in columnar
+        `TokenStorage`, slices are views of [start_, stop_) range of the
+        parent document storage.
+    """
 
     def __init__(self, text: str, tok_config: TokenizingConfig=None,
-                 tagger=POSTagger(), stemmer=get_stem_func()):
+                 tagger=models.SHARED, stemmer=models.SHARED,
+                 cache: AnalysisCache=None):
         tokenize = get_tokenizer(tok_config)
+        tagger = models.resolve(models.TAGGER, tagger)
+        stemmer = models.resolve(models.STEMMER, stemmer)
 
-        tokens, spaces = tokenize(text)
-        stems = [stemmer(tok.lower()) for tok in tokens]
-        if tagger:
+        key = None
+        if cache is not None:
+            key = cache.make_key(text, tok_config, tagger, stemmer)
+            storage = cache.get(key, text) if key else None
+            if storage is not None:
+                self._set_storage(storage)
+                return
+
+        tokens, spaces, spans = tokenize(text, with_spans=True)
+        stems = stem_tokens(tokens, stemmer)
+        if tagger and shares_stemmer(tagger, stemmer):
+            tags = tagger.tag(tokens, stems)
+        elif tagger:
             tags = tagger.tag(tokens)
         else:
             tags = [None] * len(tokens)
 
-        self.tokens = []
-        offset = 0
-        tok_pos = 0
-        for tok, tag, stem, space in zip(tokens, tags, stems, spaces):
-            token = Token(tok, tag, stem, space, offset, tok_pos)
-            self.tokens.append(token)
-            offset += len(tok) + int(space)
-            tok_pos += 1
+        self._build(text, tokens, spaces, spans, tags, stems)
+        if key:
+            cache.put(key, self.storage_)
+
+    @classmethod
+    def from_texts(cls, texts: t.Iterable[str],
+                   batch_size: int=DEFAULT_BATCH_SIZE,
+                   tok_config: TokenizingConfig=None,
+                   tagger=models.SHARED, stemmer=models.SHARED,
+                   cache: AnalysisCache=None) -> t.Iterator[BirchType]:
+        """
+            Lazily build documents from texts, tagging them in batches
+            of `batch_size` documents.
+        """
+        tokenize = get_tokenizer(tok_config)
+        tagger = models.resolve(models.TAGGER, tagger)
+        stemmer = models.resolve(models.STEMMER, stemmer)
+
+        texts = iter(texts)
+        while True:
+            batch_texts = list(itertools.islice(texts, batch_size))
+            if not batch_texts:
+                break
+
+            if cache is None:
+                yield from cls._analyse_batch(batch_texts, tokenize,
+                                              tagger, stemmer)
+                continue
+
+            keys = [cache.make_key(text, tok_config, tagger, stemmer)
+                    for text in batch_texts]
+            storages = [cache.get(key, text) if key else None
+                        for key, text in zip(keys, batch_texts)]
+            analysed = iter(cls._analyse_batch(
+                [text for text, storage in zip(batch_texts, storages)
+                 if storage is None], tokenize, tagger, stemmer))
+
+            for key, storage in zip(keys, storages):
+                if storage is not None:
+                    yield cls.from_storage(storage)
+                    continue
+
+                birch = next(analysed)
+                if key:
+                    cache.put(key, birch.storage_)
+                yield birch
+
+    @classmethod
+    def _analyse_batch(cls, texts: t.List[str], tokenize: t.Callable,
+                       tagger, stemmer: t.Callable) -> t.List[BirchType]:
+        batch = [tokenize(text, with_spans=True) for text in texts]
+
+        batch_tokens = [tokens for tokens, _, _ in batch]
+        batch_stems = [stem_tokens(tokens, stemmer) for tokens in batch_tokens]
+        if tagger and shares_stemmer(tagger, stemmer):
+            batch_tags = tagger.tag_many(batch_tokens, batch_stems)
+        elif tagger:
+            batch_tags = tagger.tag_many(batch_tokens)
+        else:
+            batch_tags = [[None] * len(toks) for toks in batch_tokens]
+
+        docs = []
+        for text, (tokens, spaces, spans), tags, stems in zip(
+                texts, batch, batch_tags, batch_stems):
+            birch = object.__new__(cls)
+            birch._build(text, tokens, spaces, spans, tags, stems)
+            docs.append(birch)
+
+        return docs
+
+    def _build(self, text: str, tokens: t.List[str], spaces: t.List[bool],
+               spans: t.List[t.Tuple[int, int]], tags: t.List[POSTag],
+               stems: t.List[str]):
+        self._set_storage(TokenStorage.build(
+            text, spans, spaces, tags, stems,
+            get_sentences_offsets(tokens, spaces)))
+
+    @classmethod
+    def from_storage(cls, storage: TokenStorage) -> BirchType:
+        birch = object.__new__(cls)
+        birch._set_storage(storage)
+        return birch
+
+    def to_bytes(self) -> bytes:
+        """
+            Serialize document to compact columnar record. Slices are
+            saved as standalone documents with their tokens only.
+        """
+        return self.storage_.slice(self.start_, self.stop_).to_bytes()
+
+    @classmethod
+    def from_bytes(cls, data) -> BirchType:
+        """
+            Load document from `to_bytes` record. Tokens columns are not
+            copied, but are read-only views of `data`.
+        """
+        return cls.from_storage(TokenStorage.from_bytes(data))
+
+    def __reduce__(self):
+        return (Birch.from_bytes, (self.to_bytes(),))
 
-        self.sentences_offsets_ = get_sentences_offsets(self.tokens)
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> BirchType:
+        """
+            Load document saved by `save`, memory-mapping the file.
+        """
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return cls.from_bytes(data)
+
+    def _set_storage(self, storage: TokenStorage, start: int=0,
+                     stop: int=None):
+        self.storage_ = storage
+        self.start_ = start
+        self.stop_ = len(storage) if stop is None else stop
+        self._fingerprint = None
+
+    @property
+    def tokens(self) -> t.List[Token]:
+        return self.storage_.tokens(self.start_, self.stop_)
 
     def __iter__(self):
-        yield from iter(self.tokens)
+        yield from self.tokens
 
     def __len__(self):
-        return len(self.tokens)
+        return self.stop_ - self.start_
 
     def __getitem__(self, index):
         if isinstance(index, int):
-            return self.tokens[index]
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("Token index out of range")
+            return self.storage_.token(self.start_ + index)
         elif isinstance(index, slice):
-            toks = self.tokens[index.start: index.stop: index.step]
-            return Birch.build_from_tokens(toks)
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return Birch.build_from_tokens(self.tokens[index])
+
+            birch = object.__new__(Birch)
+            birch._set_storage(self.storage_, self.start_ + start,
+                               self.start_ + max(start, stop))
+            return birch
 
         raise ValueError("Invalid index value, expected int or slice")
 
     @classmethod
     def build_from_tokens(cls, tokens: t.List[Token]) -> BirchType:
         birch = object.__new__(Birch)
-        birch.tokens = tokens
+        birch._set_storage(TokenStorage.from_tokens(list(tokens)))
         return birch
 
     @property
     def bounds(self):
-        return self.tokens[0].start, self.tokens[-1].end
+        if not len(self):
+            raise IndexError("Empty document has no bounds")
+
+        return (int(self.storage_.starts[self.start_]),
+                int(self.storage_.ends[self.stop_ - 1]))
+
+    @property
+    def sentences_offsets_(self) -> t.List[int]:
+        """
+            Indices of tokens, which start new sentences.
+        """
+        offsets = self.storage_.sentences_offsets_range(self.start_,
+                                                        self.stop_)
+        return (offsets - self.start_).tolist()
 
     @property
-    def sentences(self):
+    def sentences(self) -> t.Iterator[BirchType]:
         last_offset = 0
         for offset in self.sentences_offsets_:
-            yield Birch.build_from_tokens(self.tokens[last_offset: offset])
+            yield self[last_offset: offset]
             last_offset = offset
 
-        yield Birch.build_from_tokens(self.tokens[last_offset:])
+        yield self[last_offset:]
+
+    def sentences_count(self) -> int:
+        return len(self.storage_.sentences_offsets_range(self.start_,
+                                                         self.stop_)) + 1
+
+    def sentence(self, index: int) -> BirchType:
+        """
+            View of sentence by its index.
+        """
+        offsets = self.sentences_offsets_
+        if index < 0:
+            index += len(offsets) + 1
+        if not 0 <= index <= len(offsets):
+            raise IndexError("Sentence index out of range")
+
+        start = offsets[index - 1] if index else 0
+        stop = offsets[index] if index < len(offsets) else len(self)
+        return self[start: stop]
+
+    def token_sentence(self, index: int) -> int:
+        """
+            Index of sentence, which contains token with given index.
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Token index out of range")
 
-    def extract_by_pattern(self, pattern: str) -> t.List[BirchType]:
-        matcher = PatternMatcher(pattern)
+        offsets = self.storage_.sentences_offsets_range(self.start_,
+                                                        self.stop_)
+        return int(np.searchsorted(offsets, self.start_ + index,
+                                   side='right'))
 
+    def char_sentence(self, offset: int) -> int:
+        """
+            Index of sentence, which contains char with given offset in
+            text. Whitespace between tokens belongs to preceding token.
+        """
+        if not len(self) or not self.bounds[0] <= offset < self.bounds[1]:
+            raise IndexError("Char offset is out of document bounds")
+
+        starts = self.storage_.starts[self.start_: self.stop_]
+        index = int(np.searchsorted(starts, offset, side='right')) - 1
+        return self.token_sentence(index)
+
+    def extract_by_pattern(self, pattern: str, by_sentences: bool=True,
+                           overlapping: bool=True) -> t.List[BirchType]:
+        return self.extract(compile_pattern(pattern),
+                            by_sentences, overlapping)
+
+    def extract(self, matcher: PatternMatcher, by_sentences: bool=True,
+                overlapping: bool=True) -> t.List[BirchType]:
         matches = []
 
-        for sent in self.sentences:
-            for start, fin in matcher.findall(sent):
-                matches.append(Birch.build_from_tokens(sent[start: fin]))
+        parts = self.sentences if by_sentences else [self]
+        for part in parts:
+            for start, fin in matcher.findall(part, overlapping):
+                matches.append(part[start: fin])
 
         return matches
 
+    def extract_all(self, pattern_set: PatternSet, by_sentences: bool=True,
+                    overlapping: bool=True
+                    ) -> t.List[t.Tuple[str, BirchType]]:
+        matches = []
+
+        parts = self.sentences if by_sentences else [self]
+        for part in parts:
+            for name, start, fin in pattern_set.findall(part, overlapping):
+                matches.append((name, part[start: fin]))
+
+        return matches
+
+    @property
+    def fingerprint(self) -> int:
+        """
+            Stable 64-bit hash of tokens strings, same in every process.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = self.storage_.fingerprint(self.start_,
+                                                          self.stop_)
+        return self._fingerprint
+
+    def _token_strings(self) -> t.List[str]:
+        return self.storage_.token_strings(self.start_, self.stop_)
+
     def __hash__(self):
-        return hash(tuple(self.tokens))
+        return self.fingerprint
 
     def __eq__(self, doc2):
-        return (hash(self) == hash(doc2) and
-                len(self) == len(doc2) and
-                all(t1 == t2 for t1, t2 in zip(self, doc2)))
+        if not isinstance(doc2, Birch):
+            return NotImplemented
+
+        return (len(self) == len(doc2) and
+                self.fingerprint == doc2.fingerprint and
+                self._token_strings() == doc2._token_strings())
 
     def __ne__(self, doc2):
-        return (hash(self) != hash(doc2) or
-                len(self) != len(doc2) or
-                any(t1 != t2 for t1, t2 in zip(self, doc)))
+        return not self == doc2
 
     def __repr__(self):
         return str(self)
@@ -103,17 +343,17 @@ class Birch:
                         for tok in self.tokens])
 
 
-def get_sentences_offsets(tokens: t.List[Token]) -> t.List[int]:
-    sentences_offsets = []
+def stem_tokens(tokens: t.List[str], stemmer: t.Callable) -> t.List[str]:
+    words = [tok.lower() for tok in tokens]
+    if hasattr(stemmer, 'stem_words'):
+        return stemmer.stem_words(words)
+
+    return [stemmer(word) for word in words]
 
-    find_line_break = False
-    for i, tok in enumerate(tokens):
-        if tok.token in '.!?' and tok.space:
-            sentences_offsets.append(i + 1)
-        elif tok.token == '\n':
-            find_line_break = True
-        elif find_line_break:
-            sentences_offsets.append(i)
-            find_line_break = False
 
-    return sentences_offsets
+def shares_stemmer(tagger, stemmer: t.Callable) -> bool:
+    """
+        Whether document stems may be passed to tagger instead of
+        stemming words again: only stems of tagger's own stemmer are.
+    """
+    return getattr(tagger, 'stemmer', None) is stemmer
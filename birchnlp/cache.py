@@ -0,0 +1,196 @@
+"""
+    Persistent on-disk cache of analysed documents, which lets to skip
+    tokenizing, stemming and tagging of texts seen before.
+"""
+import time
+import sqlite3
+import threading
+import typing as t
+
+import xxhash
+
+from birchnlp.storage import TokenStorage
+from birchnlp.tokenizer.config import TokenizingConfig
+from birchnlp.utils import ENCODING_ERRORS, CacheInfo
+
+
+DEFAULT_MAX_BYTES = 2**30
+NO_MODEL_VERSION = "none"
+# Hits refresh record usage time only if it is older, so that most of
+# reads don't write to database
+USED_UPDATE_INTERVAL = 60.
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS records (
+        key TEXT PRIMARY KEY,
+        data BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        used REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS records_used ON records (used);
+    CREATE TABLE IF NOT EXISTS meta (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO meta
+        SELECT 'size', COALESCE(SUM(size), 0) FROM records;
+"""
+
+
+class AnalysisCache:
+    """
+        Content-addressed cache of documents storages in SQLite file.
+        Records are keyed by hash of text, tokenizer config and models
+        versions. Least recently used records are evicted, when their
+        total size, kept in `meta` table, exceeds `max_bytes`. Usage
+        time of hit record is refreshed once per `used_update_interval`
+        seconds.
+    """
+
+    def __init__(self, path: str, max_bytes: int=DEFAULT_MAX_BYTES,
+                 used_update_interval: float=USED_UPDATE_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.used_update_interval = used_update_interval
+        self.hits = 0
+        self.misses = 0
+
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def make_key(self, text: str, tok_config: TokenizingConfig,
+                 tagger, stemmer) -> t.Optional[str]:
+        """
+            Key of text analysis, None if some model has no `version`
+            to tell its results apart.
+        """
+        versions = [getattr(model, 'version', None) if model
+                    else NO_MODEL_VERSION for model in (tagger, stemmer)]
+        if None in versions:
+            return None
+
+        # configs rules are class attributes
+        config_cls = type(tok_config)
+        if config_cls not in self._fingerprints:
+            self._fingerprints[config_cls] = get_config_fingerprint(
+                tok_config)
+
+        key = xxhash.xxh64(text.encode("utf-8", ENCODING_ERRORS))
+        for part in [self._fingerprints[config_cls]] + versions:
+            key.update(b"\0" + part.encode("utf-8"))
+
+        return key.hexdigest()
+
+    def get(self, key: str, text: str) -> t.Optional[TokenStorage]:
+        """
+            Cached storage of the text or None. Text is compared with the
+            stored one, so hashes collisions are misses.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT data, used FROM records "
+                                     "WHERE key = ?", (key,)).fetchone()
+
+            storage = None
+            if row is not None:
+                try:
+                    storage = TokenStorage.from_bytes(row[0])
+                except ValueError:
+                    # record of other format version
+                    pass
+
+            if storage is None or storage.text != text:
+                self.misses += 1
+                return None
+
+            now = time.time()
+            if now - row[1] >= self.used_update_interval:
+                self._conn.execute("UPDATE records SET used = ? "
+                                   "WHERE key = ?", (now, key))
+            self.hits += 1
+
+        return storage
+
+    def put(self, key: str, storage: TokenStorage):
+        data = storage.to_bytes()
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute("SELECT size FROM records "
+                                     "WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO records "
+                               "VALUES (?, ?, ?, ?)",
+                               (key, data, len(data), time.time()))
+            self._add_size(len(data) - (row[0] if row else 0))
+            self._evict()
+
+    def _evict(self):
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+
+        evicted = []
+        evicted_size = 0
+        for key, size in self._conn.execute("SELECT key, size FROM records "
+                                            "ORDER BY used"):
+            if evicted_size >= excess:
+                break
+            evicted.append((key,))
+            evicted_size += size
+
+        self._conn.executemany("DELETE FROM records WHERE key = ?", evicted)
+        self._add_size(-evicted_size)
+
+    def _add_size(self, delta: int):
+        self._conn.execute("UPDATE meta SET value = value + ? "
+                           "WHERE name = 'size'", (delta,))
+
+    def size(self) -> int:
+        """
+            Total size of records in bytes.
+        """
+        return self._conn.execute("SELECT value FROM meta "
+                                  "WHERE name = 'size'").fetchone()[0]
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM records")
+            self._conn.execute("UPDATE meta SET value = 0 "
+                               "WHERE name = 'size'")
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.max_bytes, self.size())
+
+    def close(self):
+        self._conn.close()
+
+
+def get_config_fingerprint(config: TokenizingConfig=None) -> str:
+    """
+        Hash of tokenizer config rules.
+    """
+    if config is None:
+        config = TokenizingConfig()
+
+    fingerprint = xxhash.xxh64()
+    for name in sorted(dir(config)):
+        if not name.isupper():
+            continue
+
+        value = getattr(config, name)
+        if hasattr(value, 'pattern'):
+            value = (value.pattern, value.flags)
+        fingerprint.update(repr((name, value)).encode("utf-8",
+                                                      ENCODING_ERRORS))
+
+    return fingerprint.hexdigest()
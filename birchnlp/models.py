@@ -0,0 +1,90 @@
+"""
+    Process-wide registry of shared models. Models are loaded on first
+    use, servers which fork workers may call `preload()` beforehand to
+    share loaded weights between processes.
+"""
+import time
+import threading
+import typing as t
+
+from birchnlp.pos_tagger import POSTagger
+from birchnlp.utils import CachedStemmer
+
+
+TAGGER = "tagger"
+STEMMER = "stemmer"
+
+# Sentinel for arguments, which should fall back to the shared model
+SHARED = object()
+
+
+def _build_tagger() -> POSTagger:
+    return POSTagger(stemmer=get_stemmer())
+
+
+_factories = {
+    TAGGER: _build_tagger,
+    STEMMER: CachedStemmer,
+}
+_models = {}
+_lock = threading.RLock()
+_load_hook = None
+
+
+def set_load_hook(hook: t.Optional[t.Callable[[str, float], None]]):
+    """
+        Set function called with model name and load time in seconds
+        every time a shared model is loaded.
+    """
+    global _load_hook
+    _load_hook = hook
+
+
+def register(name: str, factory: t.Callable):
+    """
+        Replace factory of the shared model, e.g. to use dense tagger.
+        Already loaded model is dropped and will be rebuilt on next use.
+    """
+    with _lock:
+        _factories[name] = factory
+        _models.pop(name, None)
+        if name == STEMMER:
+            # shared tagger is built with shared stemmer
+            _models.pop(TAGGER, None)
+
+
+def get_model(name: str):
+    try:
+        return _models[name]
+    except KeyError:
+        pass
+
+    with _lock:
+        if name not in _models:
+            start = time.perf_counter()
+            _models[name] = _factories[name]()
+            if _load_hook is not None:
+                _load_hook(name, time.perf_counter() - start)
+
+    return _models[name]
+
+
+def get_tagger() -> POSTagger:
+    return get_model(TAGGER)
+
+
+def get_stemmer() -> CachedStemmer:
+    return get_model(STEMMER)
+
+
+def resolve(name: str, model):
+    return get_model(name) if model is SHARED else model
+
+
+def preload(names: t.Iterable[str]=None):
+    for name in (names if names is not None else list(_factories)):
+        get_model(name)
+
+
+def is_loaded(name: str) -> bool:
+    return name in _models
@@ -1 +1,2 @@
-from .pattern_matcher import PatternMatcher
+from .pattern_matcher import PatternMatcher, compile_pattern, patterns_cache
+from .pattern_set import PatternSet
@@ -0,0 +1,199 @@
+import threading
+import typing as t
+
+from birchnlp.pattern_matcher.schemes import State, PatternToken, TokenTypes
+from birchnlp.pos_tagger.schemes import POSTag
+from birchnlp.schemes import Token
+
+
+# Symbol of tokens without POS tag, matched only by any-token atom
+NO_POS_SYMBOL = len(POSTag)
+POS_ALPHABET_SIZE = NO_POS_SYMBOL + 1
+
+DEAD = -1
+
+
+class DFA:
+    """
+        Deterministic automata, built lazily from NFA by subset
+        construction. Token symbol is its POS tag combined with bitmask
+        of word regex atoms, which match the token, so for POS-only
+        patterns alphabet is just POS tags. Transitions are computed on
+        first use and cached, so matching is a table walk per token.
+    """
+
+    def __init__(self, start_state: State,
+                 end_labels: t.Dict[State, int]=None):
+        if end_labels is None:
+            end_labels = {state: 0 for state in iter_nfa_states(start_state)
+                          if state.is_end}
+        self.end_labels = end_labels
+
+        self.states_ = []
+        self.states_ids_ = {}
+        self.transitions_ = []
+        self.accepting_ = []
+        self._lock = threading.Lock()
+
+        self.regex_atoms_ = {}
+        for state in iter_nfa_states(start_state):
+            for trans in state.transitions:
+                if trans.token_type == TokenTypes.regex:
+                    self.regex_atoms_.setdefault(trans.token.pattern,
+                                                 trans.token)
+        self.regex_bits_ = {pattern: 1 << i
+                            for i, pattern in enumerate(self.regex_atoms_)}
+
+        self.start = self._add_state(epsilon_closure([start_state]))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _add_state(self, nfa_states: t.FrozenSet[State]) -> int:
+        if not nfa_states:
+            return DEAD
+
+        state = self.states_ids_.get(nfa_states)
+        if state is None:
+            state = len(self.states_)
+            self.states_ids_[nfa_states] = state
+            self.states_.append(nfa_states)
+            self.transitions_.append({})
+            self.accepting_.append(frozenset(
+                self.end_labels[s] for s in nfa_states
+                if s in self.end_labels))
+
+        return state
+
+    def get_symbol(self, token: Token) -> int:
+        symbol = NO_POS_SYMBOL if token.pos is None else token.pos.value
+
+        mask = 0
+        for pattern, regex in self.regex_atoms_.items():
+            if regex.match(token.token):
+                mask |= self.regex_bits_[pattern]
+
+        return symbol + POS_ALPHABET_SIZE * mask
+
+    def _matches_symbol(self, pattern_token: PatternToken,
+                        symbol: int) -> bool:
+        if pattern_token.token_type == TokenTypes.unknown:
+            return True
+        elif pattern_token.token_type == TokenTypes.pos_tag:
+            return pattern_token.token.value == symbol % POS_ALPHABET_SIZE
+
+        mask = symbol // POS_ALPHABET_SIZE
+        return bool(mask & self.regex_bits_[pattern_token.token.pattern])
+
+    def step(self, state: int, symbol: int) -> int:
+        next_state = self.transitions_[state].get(symbol)
+        if next_state is None:
+            targets = [target
+                       for nfa_state in self.states_[state]
+                       for trans, target in nfa_state.transitions.items()
+                       if self._matches_symbol(trans, symbol)]
+            # Compiled matchers are shared, so guard states registration
+            with self._lock:
+                next_state = self.transitions_[state].get(symbol)
+                if next_state is None:
+                    next_state = self._add_state(epsilon_closure(targets))
+                    self.transitions_[state][symbol] = next_state
+
+        return next_state
+
+    def longest_match(self, words: t.Iterable[Token]) -> int:
+        best_match = 0
+
+        state = self.start
+        for token_ind, token in enumerate(words):
+            state = self.step(state, self.get_symbol(token))
+            if state == DEAD:
+                break
+            if self.accepting_[state]:
+                best_match = token_ind + 1
+
+        return best_match
+
+    def longest_matches(self, words: t.Iterable[Token]) -> t.List[int]:
+        """
+            Length of the longest match starting at every position.
+        """
+        return [max(ends.values(), default=start) - start
+                for start, ends in enumerate(self.farthest_ends(words))]
+
+    def farthest_ends(self, words: t.Iterable[Token]
+                      ) -> t.List[t.Dict[int, int]]:
+        """
+            Farthest end of non-empty match of every end label for every
+            start position. Walks from different starts, which reach the
+            same automata state at the same position, have the same
+            continuation, so ends are memoized by (position, state) and
+            every pair is walked at most once.
+        """
+        symbols = [self.get_symbol(token) for token in words]
+        memo = {}
+
+        starts_ends = []
+        for start in range(len(symbols)):
+            path = []
+            pos, state = start, self.start
+            while True:
+                ends = memo.get((pos, state))
+                if ends is not None:
+                    break
+
+                path.append((pos, state))
+                ends = {}
+                if pos == len(symbols):
+                    break
+
+                state = self.step(state, symbols[pos])
+                if state == DEAD:
+                    break
+                pos += 1
+
+            for pos, state in reversed(path):
+                labels = self.accepting_[state]
+                if not labels.issubset(ends):
+                    ends = dict(ends)
+                    for label in labels:
+                        ends.setdefault(label, pos)
+                memo[pos, state] = ends
+
+            if start in ends.values():
+                ends = {label: end for label, end in ends.items()
+                        if end > start}
+            starts_ends.append(ends)
+
+        return starts_ends
+
+
+def epsilon_closure(states: t.Iterable[State]) -> t.FrozenSet[State]:
+    closure = set()
+    stack = list(states)
+    while stack:
+        state = stack.pop()
+        if state not in closure:
+            closure.add(state)
+            stack.extend(state.epsilon)
+
+    return frozenset(closure)
+
+
+def iter_nfa_states(start_state: State) -> t.Iterator[State]:
+    visited = set()
+    stack = [start_state]
+    while stack:
+        state = stack.pop()
+        if state in visited:
+            continue
+        visited.add(state)
+        yield state
+        stack.extend(state.epsilon)
+        stack.extend(state.transitions.values())
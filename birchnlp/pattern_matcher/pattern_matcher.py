@@ -3,11 +3,13 @@ import itertools
 import typing as t
 
 from birchnlp.pattern_matcher.recursive_descent_parser import Parser
+from birchnlp.pattern_matcher.dfa import DFA
 from birchnlp.pattern_matcher.schemes import (
     State, StartEndPair, PatternToken,
     OPERANDS, WORD_PATTERN, POS_TAGS_PATTERN)
 from birchnlp.pos_tagger.schemes import POSTag
 from birchnlp.schemes import Token
+from birchnlp.utils import LRUCache
 
 VARS_RE = re.compile(r"({}|{}|\.)".format(
     POS_TAGS_PATTERN, WORD_PATTERN))
@@ -15,64 +17,62 @@ VARS_RE = re.compile(r"({}|{}|\.)".format(
 TOKENS_RE = re.compile(r"({}|{}|{}|\.)".format(
     POS_TAGS_PATTERN, WORD_PATTERN, OPERANDS))
 
+PATTERNS_CACHE_SIZE = 256
+
 
 class PatternMatcher:
 
     def __init__(self, pattern: str):
         self.pattern = pattern
-        tokens = tokenize_pattern(pattern)
-        reverse_polish_tokens = Parser(tokens).parse()
-        self.start_state = build_nfa(reverse_polish_tokens)
+        self.start_state = compile_nfa(pattern)
+        self.dfa = DFA(self.start_state)
 
-    def findall(self, words: t.Iterable[Token]) -> t.List[t.Tuple[int, int]]:
+    def findall(self, words: t.Sequence[Token], overlapping: bool=True
+                ) -> t.List[t.Tuple[int, int]]:
         """
-            Works well on sentences, not on whole big text corpuses.
+            Longest match for every start position, or leftmost-longest
+            matches, which don't overlap each other. Runs in linear time,
+            so may be applied to whole documents.
         """
         coords = []
 
+        lengths = self.dfa.longest_matches(words)
         counter = 0
-        while counter < len(words):
-            best_match = self.extract_best_match(words[counter:])
+        while counter < len(lengths):
+            best_match = lengths[counter]
             if best_match != 0:
                 coords.append((counter, counter + best_match))
+                if not overlapping:
+                    counter += best_match
+                    continue
             counter += 1
 
         return coords
 
-    def addstate(self, state: State, states: t.Set[State]):
-        if state in states:
-            return
-        states.add(state)
-        for eps in state.epsilon:
-            self.addstate(eps, states)
-
     def extract_best_match(self, words: t.Iterable[Token]) -> int:
-        best_match = 0
+        return self.dfa.longest_match(words)
+
+    def __str__(self):
+        return self.pattern
 
-        current_states = set()
-        self.addstate(self.start_state, current_states)
 
-        for token_ind, token in enumerate(words):
-            next_states = set()
-            for state in current_states:
-                for trans in state.transitions:
-                    if trans.is_correct_token(token):
-                        trans_state = state.transitions[trans]
-                        self.addstate(trans_state, next_states)
+# Compiled matchers by pattern string, see `compile_pattern`
+patterns_cache = LRUCache(PATTERNS_CACHE_SIZE)
 
-            if not next_states:
-                break
-            current_states = next_states
 
-            for state in current_states:
-                if state.is_end:
-                    best_match = max(token_ind + 1, best_match)
-                    break
+def compile_pattern(pattern: str) -> PatternMatcher:
+    matcher = patterns_cache.get(pattern)
+    if matcher is None:
+        matcher = PatternMatcher(pattern)
+        patterns_cache[pattern] = matcher
 
-        return best_match
+    return matcher
 
-    def __str__(self):
-        return self.pattern
+
+def compile_nfa(pattern: str) -> State:
+    tokens = tokenize_pattern(pattern)
+    reverse_polish_tokens = Parser(tokens).parse()
+    return build_nfa(reverse_polish_tokens)
 
 
 def build_nfa(tokens: t.List[str]) -> State:
@@ -0,0 +1,53 @@
+import typing as t
+
+from birchnlp.pattern_matcher.dfa import DFA, iter_nfa_states
+from birchnlp.pattern_matcher.pattern_matcher import compile_nfa
+from birchnlp.pattern_matcher.schemes import State
+from birchnlp.schemes import Token
+
+
+class PatternSet:
+    """
+        Many named patterns compiled into one automata, which accepting
+        states are labeled with pattern ids, so all patterns are matched
+        in one pass and cost barely depends on patterns count.
+    """
+
+    def __init__(self, patterns: t.Dict[str, str]):
+        self.names = list(patterns)
+        self.patterns = [patterns[name] for name in self.names]
+
+        starts, end_labels = [], {}
+        for pattern_id, pattern in enumerate(self.patterns):
+            start_state = compile_nfa(pattern)
+            starts.append(start_state)
+            for state in iter_nfa_states(start_state):
+                if state.is_end:
+                    end_labels[state] = pattern_id
+
+        self.start_state = State(epsilon=starts)
+        self.dfa = DFA(self.start_state, end_labels)
+
+    def findall(self, words: t.Sequence[Token], overlapping: bool=True
+                ) -> t.List[t.Tuple[str, int, int]]:
+        """
+            (pattern_name, start, end) triples, ordered by start and
+            patterns order. Same as `PatternMatcher.findall` of every
+            pattern, non-overlapping matches are chosen per pattern.
+        """
+        matches = []
+
+        next_starts = [0] * len(self.names)
+        for start, ends in enumerate(self.dfa.farthest_ends(words)):
+            for pattern_id in sorted(ends):
+                if start < next_starts[pattern_id]:
+                    continue
+                end = ends[pattern_id]
+                matches.append((self.names[pattern_id], start, end))
+                if not overlapping:
+                    next_starts[pattern_id] = end
+
+        return matches
+
+    def __len__(self):
+        return len(self.names)
@@ -0,0 +1,121 @@
+import os
+import itertools
+import multiprocessing
+import typing as t
+from collections import deque
+
+import numpy as np
+
+from birchnlp import models
+from birchnlp.birch import Birch
+from birchnlp.storage import TokenStorage, OFFSET_DTYPE, STEM_DTYPE
+from birchnlp.tokenizer.config import TokenizingConfig
+
+
+DEFAULT_CHUNK_SIZE = 64
+# Chunks in flight per worker, bounds memory on endless inputs
+PENDING_PER_WORKER = 2
+
+_worker_tok_config = None
+
+
+def pipe(texts: t.Iterable[str], n_workers: int=None,
+         chunk_size: int=DEFAULT_CHUNK_SIZE,
+         tok_config: TokenizingConfig=None) -> t.Iterator[Birch]:
+    """
+        Analyse texts in forked worker processes, yielding documents in
+        input order. Shared models are loaded before forking, so workers
+        share weights pages copy-on-write. Every chunk of documents comes
+        back packed into a few flat arrays instead of pickled tokens.
+    """
+    if n_workers is None:
+        n_workers = os.cpu_count()
+
+    if n_workers <= 1:
+        yield from Birch.from_texts(texts, chunk_size, tok_config)
+        return
+
+    models.preload()
+
+    texts = iter(texts)
+    chunks = iter(lambda: list(itertools.islice(texts, chunk_size)), [])
+
+    context = multiprocessing.get_context('fork')
+    with context.Pool(n_workers, initializer=_init_worker,
+                      initargs=(tok_config,)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_process_chunk, (chunk,)))
+            if len(pending) >= n_workers * PENDING_PER_WORKER:
+                yield from unpack_documents(pending.popleft().get())
+
+        while pending:
+            yield from unpack_documents(pending.popleft().get())
+
+
+def _init_worker(tok_config: TokenizingConfig):
+    global _worker_tok_config
+    _worker_tok_config = tok_config
+
+
+def _process_chunk(texts: t.List[str]) -> tuple:
+    docs = Birch.from_texts(texts, len(texts), _worker_tok_config)
+    return pack_documents(list(docs))
+
+
+def pack_documents(docs: t.List[Birch]) -> tuple:
+    """
+        Pack documents built from texts into concatenated columns with
+        one stems table for all of them.
+    """
+    stems_ids = {}
+    stem_ids = []
+    for doc in docs:
+        storage = doc.storage_
+        doc_stems_ids = np.array([stems_ids.setdefault(stem, len(stems_ids))
+                                  for stem in storage.stems],
+                                 dtype=STEM_DTYPE)
+        stem_ids.append(doc_stems_ids[storage.stem_ids])
+
+    storages = [doc.storage_ for doc in docs]
+    columns = [np.concatenate([getattr(storage, name)
+                               for storage in storages])
+               for name in ('starts', 'ends', 'pos_ids', 'spaces')]
+
+    return ([storage.text for storage in storages],
+            np.array([len(storage) for storage in storages],
+                     dtype=OFFSET_DTYPE),
+            columns, np.concatenate(stem_ids), list(stems_ids),
+            [storage.sentences_offsets for storage in storages])
+
+
+def unpack_documents(packed: tuple) -> t.Iterator[Birch]:
+    texts, lengths, columns, stem_ids, stems, sentences_offsets = packed
+
+    offset = 0
+    for text, length, doc_sentences_offsets in zip(
+            texts, lengths.tolist(), sentences_offsets):
+        starts, ends, pos_ids, spaces = [column[offset: offset + length]
+                                         for column in columns]
+        doc_stem_ids, doc_stems = own_stems(
+            stem_ids[offset: offset + length], stems)
+        storage = TokenStorage(text, starts, ends, starts, pos_ids, spaces,
+                               doc_stem_ids, doc_stems, doc_sentences_offsets)
+        yield Birch.from_storage(storage)
+        offset += length
+
+
+def own_stems(stem_ids: np.ndarray, stems: t.List[str]
+              ) -> t.Tuple[np.ndarray, t.List[str]]:
+    """
+        Remap stems ids of document from the chunk's stems table to its
+        own one, ordered by first occurrence as in built documents.
+    """
+    chunk_ids, first, inverse = np.unique(stem_ids, return_index=True,
+                                          return_inverse=True)
+    order = np.argsort(first, kind='mergesort')
+    ranks = np.empty(len(order), dtype=STEM_DTYPE)
+    ranks[order] = np.arange(len(order), dtype=STEM_DTYPE)
+
+    return (ranks[inverse],
+            [stems[i] for i in chunk_ids[order].tolist()])
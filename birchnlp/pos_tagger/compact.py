@@ -0,0 +1,203 @@
+"""
+    Builds compact tagger weights for memory-constrained deployments:
+    weights are quantized to float16 or int8 with per-class scales and
+    near-zero weights are pruned. The largest pruning threshold, which
+    keeps agreement with the full model on held-out texts, is chosen and
+    a report of agreement, weights size and tagging time is printed:
+
+        python -m birchnlp.pos_tagger.compact out_dir --dtype int8 \\
+            --held-out texts.txt --min-agreement 0.995
+
+    Compact weights are loaded by `POSTagger(data_dir=out_dir)`.
+"""
+import os
+import time
+import argparse
+import tempfile
+import typing as t
+
+import numpy as np
+import scipy.sparse as sprs
+
+from birchnlp.pos_tagger.pos_tagger import (
+    POSTagger, DATA_DIR, INTERCEPT_FILE, COEF_DATA_FILE, COEF_INDICES_FILE,
+    COEF_INDPTR_FILE, COEF_SCALE_FILE)
+from birchnlp.tokenizer import get_tokenizer
+
+
+DTYPES = {
+    'float32': np.float32,
+    'float16': np.float16,
+    'int8': np.int8,
+}
+INT8_MAX = 127
+# Quantiles of absolute weights, tried as pruning thresholds
+PRUNE_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+MIN_AGREEMENT = 0.995
+TIMING_REPEATS = 3
+
+CompactReport = t.NamedTuple("CompactReport", [('name', str),
+                                               ('threshold', float),
+                                               ('agreement', float),
+                                               ('size', int),
+                                               ('seconds', float)])
+
+
+def prune(coef: sprs.csr_matrix, threshold: float) -> sprs.csr_matrix:
+    """
+        Drop weights with absolute value below `threshold`, features
+        left without weights take no space in dense tables as well.
+    """
+    coef = sprs.csr_matrix(coef, copy=True)
+    coef.data[np.abs(coef.data) < threshold] = 0
+    coef.eliminate_zeros()
+
+    return coef
+
+
+def quantize(coef: sprs.csr_matrix, dtype
+             ) -> t.Tuple[sprs.csr_matrix, t.Optional[np.ndarray]]:
+    """
+        Cast weights to `dtype`. Weights of every class are quantized
+        to int8 with their own scale, which is returned as well.
+    """
+    coef = sprs.csr_matrix(coef, copy=True)
+    if dtype != np.int8:
+        coef.data = coef.data.astype(dtype)
+        return coef, None
+
+    scale = abs(coef).max(axis=0).toarray().ravel() / INT8_MAX
+    scale[scale == 0] = 1
+
+    coef.data = np.rint(coef.data / scale[coef.indices]).astype(np.int8)
+    coef.eliminate_zeros()
+
+    return coef, scale.astype(np.float32)
+
+
+def save_weights(out_dir: str, coef: sprs.csr_matrix,
+                 scale: t.Optional[np.ndarray], intercept: np.ndarray):
+    os.makedirs(out_dir, exist_ok=True)
+
+    arrays = {
+        COEF_DATA_FILE: coef.data,
+        COEF_INDICES_FILE: coef.indices.astype(np.int32, copy=False),
+        COEF_INDPTR_FILE: coef.indptr.astype(np.int32, copy=False),
+        INTERCEPT_FILE: intercept,
+    }
+    if scale is not None:
+        arrays[COEF_SCALE_FILE] = scale
+    elif os.path.exists(os.path.join(out_dir, COEF_SCALE_FILE)):
+        os.remove(os.path.join(out_dir, COEF_SCALE_FILE))
+
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, name), array)
+
+
+def weights_size(coef: sprs.csr_matrix) -> int:
+    return coef.data.nbytes + coef.indices.nbytes + coef.indptr.nbytes
+
+
+def evaluate(tagger: POSTagger, sents: t.List[t.List[str]],
+             reference: t.List[int]) -> t.Tuple[float, float]:
+    """
+        Share of tags equal to `reference` ones and best tagging time.
+    """
+    seconds = float('inf')
+    for _ in range(TIMING_REPEATS):
+        start = time.perf_counter()
+        predictions = tagger._predict(sents).argmax(axis=1)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    if not len(reference):
+        return 1.0, seconds
+
+    return float(np.mean(predictions == reference)), seconds
+
+
+def compact_weights(tagger: POSTagger, sents: t.List[t.List[str]],
+                    dtype=np.int8, min_agreement: float=MIN_AGREEMENT,
+                    out_dir: str=None) -> t.List[CompactReport]:
+    """
+        Quantize and prune weights of `tagger` with the largest
+        threshold, which keeps agreement with its tags on `sents`.
+        Saves chosen weights to `out_dir` and returns reports of the
+        full model and every tried variant.
+    """
+    full_coef = sprs.csr_matrix(tagger.coef_)
+    reference = tagger._predict(sents).argmax(axis=1)
+
+    _, seconds = evaluate(tagger, sents, reference)
+    reports = [CompactReport('full', 0.0, 1.0, weights_size(full_coef),
+                             seconds)]
+
+    thresholds = [0.0]
+    if full_coef.nnz:
+        weights = np.abs(full_coef.data)
+        thresholds += [float(np.percentile(weights, 100 * q))
+                       for q in PRUNE_QUANTILES]
+
+    chosen = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for threshold in thresholds:
+            coef, scale = quantize(prune(full_coef, threshold), dtype)
+            save_weights(tmp_dir, coef, scale, tagger.intercept_)
+
+            compact_tagger = POSTagger(data_dir=tmp_dir,
+                                       stemmer=tagger.stemmer)
+            agreement, seconds = evaluate(compact_tagger, sents, reference)
+            reports.append(CompactReport(np.dtype(dtype).name, threshold,
+                                         agreement, weights_size(coef),
+                                         seconds))
+            if agreement < min_agreement:
+                break
+            chosen = (coef, scale)
+
+    if out_dir is not None and chosen is not None:
+        save_weights(out_dir, *chosen, tagger.intercept_)
+
+    return reports
+
+
+def format_report(reports: t.List[CompactReport]) -> str:
+    full = reports[0]
+    lines = ["%-8s %10s %10s %10s %10s %8s" % (
+        "weights", "threshold", "agreement", "size, MB", "time, ms",
+        "speedup")]
+    for report in reports:
+        lines.append("%-8s %10.4g %10.4f %10.2f %10.2f %8.2f" % (
+            report.name, report.threshold, report.agreement,
+            report.size / 2**20, report.seconds * 1000,
+            full.seconds / report.seconds))
+
+    return "\n".join(lines)
+
+
+def read_sents(path: str) -> t.List[t.List[str]]:
+    tokenize = get_tokenizer()
+    with open(path) as f:
+        return [tokens for tokens, _ in map(tokenize, f) if tokens]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build compact weights")
+    parser.add_argument('out_dir')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--dtype', choices=sorted(DTYPES), default='int8')
+    parser.add_argument('--held-out', required=True,
+                        help="text file, every line is tagged separately")
+    parser.add_argument('--min-agreement', type=float, default=MIN_AGREEMENT)
+    args = parser.parse_args()
+
+    reports = compact_weights(POSTagger(data_dir=args.data_dir),
+                              read_sents(args.held_out), DTYPES[args.dtype],
+                              args.min_agreement, args.out_dir)
+    print(format_report(reports))
+
+    if reports[1].agreement < args.min_agreement:
+        print("No variant keeps agreement %g, weights are not saved"
+              % args.min_agreement)
+
+
+if __name__ == '__main__':
+    main()
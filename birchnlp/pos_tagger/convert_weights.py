@@ -0,0 +1,41 @@
+"""
+    Converts compressed `coef.npz` weights to uncompressed CSR arrays,
+    which `POSTagger` memory-maps instead of loading into every process:
+
+        python -m birchnlp.pos_tagger.convert_weights [data_dir [out_dir]]
+"""
+import os
+import sys
+import shutil
+
+import numpy as np
+import scipy.sparse as sprs
+
+from birchnlp.pos_tagger.pos_tagger import (
+    DATA_DIR, COEF_FILE, INTERCEPT_FILE,
+    COEF_DATA_FILE, COEF_INDICES_FILE, COEF_INDPTR_FILE)
+
+
+def convert_weights(data_dir: str=DATA_DIR, out_dir: str=None):
+    out_dir = data_dir if out_dir is None else out_dir
+    os.makedirs(out_dir, exist_ok=True)
+
+    coef = sprs.csr_matrix(sprs.load_npz(os.path.join(data_dir, COEF_FILE)))
+    arrays = {
+        COEF_DATA_FILE: coef.data,
+        COEF_INDICES_FILE: coef.indices.astype(np.int32, copy=False),
+        COEF_INDPTR_FILE: coef.indptr.astype(np.int32, copy=False),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, name), array)
+
+    if os.path.abspath(out_dir) != os.path.abspath(data_dir):
+        shutil.copy(os.path.join(data_dir, INTERCEPT_FILE), out_dir)
+
+
+def main():
+    convert_weights(*sys.argv[1:3])
+
+
+if __name__ == '__main__':
+    main()
@@ -8,7 +8,7 @@ import numpy as np
 import scipy.sparse as sprs
 
 from birchnlp.pos_tagger.schemes import POSTag
-from birchnlp.utils import get_stem_func
+from birchnlp.utils import CachedStemmer, LRUCache
 
 
 SEED = 1337
@@ -31,28 +31,79 @@ PREFIX_FEATURE_PATTERN = "%d_prefix_%s"
 MIN_CHARS = 2
 MAX_CHARS = 5
 MIN_WORD_LEN = 4
+WINDOW_SIZE = 5
+# Cached word takes about 0.8 KB with its key, so the cache of most
+# frequent word forms stays within 16 MB per process
+FEATURES_CACHE_SIZE = 20000
 
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'weights')
 COEF_FILE = "coef.npz"
 INTERCEPT_FILE = "intercept.npy"
+# Uncompressed CSR arrays of weights, which are memory-mapped and so
+# shared by all processes through OS page cache
+COEF_DATA_FILE = "coef_data.npy"
+COEF_INDICES_FILE = "coef_indices.npy"
+COEF_INDPTR_FILE = "coef_indptr.npy"
+# Per-class scales of quantized weights, see `compact` module
+COEF_SCALE_FILE = "coef_scale.npy"
 
+POS_TAGS = list(POSTag)
 
-class POSTagger(object):
 
-    def __init__(self, data_dir=DATA_DIR):
-        self.coef_, self.intercept_ = self._load_weights(data_dir)
+class POSTagger(object):
 
-        self.stemmer = get_stem_func()
+    def __init__(self, data_dir=DATA_DIR,
+                 features_cache_size: int=FEATURES_CACHE_SIZE,
+                 dense: bool=False, stemmer: CachedStemmer=None):
+        self.coef_, self.intercept_, self.coef_scale_ = self._load_weights(
+            data_dir)
+
+        self.dense = dense
+        if dense:
+            self.rows_map_, self.table_ = build_dense_weights(self.coef_)
+
+        self.stemmer = stemmer if stemmer is not None else CachedStemmer()
+        self.features_cache = LRUCache(features_cache_size)
+        self._version = None
+
+    @property
+    def version(self) -> str:
+        """
+            Hash of weights, which identifies tagger predictions.
+        """
+        if self._version is None:
+            coef = sprs.csr_matrix(self.coef_)
+            arrays = [coef.data, coef.indices.astype(np.int32, copy=False),
+                      coef.indptr.astype(np.int32, copy=False),
+                      self.intercept_]
+            if self.coef_scale_ is not None:
+                arrays.append(self.coef_scale_)
+
+            weights_hash = xxhash.xxh64(seed=SEED)
+            for array in arrays:
+                weights_hash.update(np.ascontiguousarray(array))
+            self._version = weights_hash.hexdigest()
+
+        return self._version
 
     def _load_weights(self, data_dir):
-        coef = sprs.load_npz(os.path.join(data_dir, COEF_FILE))
         intercept = np.load(os.path.join(data_dir, INTERCEPT_FILE))
 
-        return coef, intercept
+        scale = None
+        if os.path.exists(os.path.join(data_dir, COEF_DATA_FILE)):
+            coef = load_mmap_weights(data_dir, len(intercept))
+            if os.path.exists(os.path.join(data_dir, COEF_SCALE_FILE)):
+                scale = np.load(os.path.join(data_dir, COEF_SCALE_FILE))
+        else:
+            coef = sprs.csr_matrix(sprs.load_npz(os.path.join(data_dir,
+                                                             COEF_FILE)))
 
-    def _get_features_words_window(self, words_window: t.List[str]
-                                   ) -> t.List[int]:
+        return coef, intercept, scale
+
+    def _get_features_words_window(self, words_window: t.List[str],
+                                   stems_window: t.List[t.Optional[str]]
+                                   ) -> t.Set[int]:
 
         features = set()
 
@@ -61,60 +112,194 @@ class POSTagger(object):
         elif words_window[3] == END_TOKEN:
             features.add(FEATURE_SENT_END_HASH)
 
-        for i, word in enumerate(words_window):
-            if word in {START_TOKEN, END_TOKEN}:
-                features.add(get_hash(WORD_FEATURE_PATTERN % (i, word)))
-                continue
+        for i, (word, stem) in enumerate(zip(words_window, stems_window)):
+            word_features = self._get_features_word(word, stem)
+            features.update(word_features[i].tolist())
+
+        return features
+
+    def _get_features_word(self, word: str, stem: str=None) -> np.ndarray:
+        """
+            Feature hashes of the word for every position in the window,
+            cached by word surface form as one compact int32 array.
+        """
+        features = self.features_cache.get(word)
+        if features is None:
+            word_features = self._build_features_word(word, stem)
+            features = np.array([[get_hash(pattern % (i, feat))
+                                  for pattern, feat in word_features]
+                                 for i in range(WINDOW_SIZE)],
+                                dtype=np.int32)
+            self.features_cache[word] = features
+
+        return features
 
-            for ind, feat in enumerate(get_basic_features(word)):
-                features.add(get_hash(BASIC_FEATURE_PATTERN % (i, feat)))
+    def _build_features_word(self, word: str, stem: str=None
+                             ) -> t.List[t.Tuple[str, str]]:
+        """
+            Features of the word, `stem` is precomputed stem of
+            lowercased word, if any.
+        """
+        if word in {START_TOKEN, END_TOKEN}:
+            return [(WORD_FEATURE_PATTERN, word)]
 
-            word = word.lower()
+        features = []
+        for feat in get_basic_features(word):
+            features.append((BASIC_FEATURE_PATTERN, feat))
 
-            for c in range(MIN_CHARS, MAX_CHARS):
-                features.add(get_hash(SUFFIX_FEATURE_PATTERN % (i, word[-c:])))
-                features.add(get_hash(PREFIX_FEATURE_PATTERN % (i, word[:c])))
+        word = word.lower()
 
-            if len(word) >= MIN_WORD_LEN:
-                word = self.stemmer(word)
+        for c in range(MIN_CHARS, MAX_CHARS):
+            features.append((SUFFIX_FEATURE_PATTERN, word[-c:]))
+            features.append((PREFIX_FEATURE_PATTERN, word[:c]))
 
-            features.add(get_hash(WORD_FEATURE_PATTERN % (i, word)))
+        if len(word) >= MIN_WORD_LEN:
+            word = stem if stem is not None else self.stemmer(word)
+
+        features.append((WORD_FEATURE_PATTERN, word))
 
         return features
 
-    def _get_features_sent(self, sent):
+    def _get_features_sent(self, sent, stems=None):
         sent_new = [START_TOKEN, START_TOKEN] + sent + [END_TOKEN, END_TOKEN]
+        if stems is None:
+            stems = [None] * len(sent)
+        stems_new = [None, None] + list(stems) + [None, None]
 
         hashes_matrix = []
-        for i in range(len(sent_new) - 4):
-            feats_hashes = self._get_features_words_window(sent_new[i:i + 5])
+        for i in range(len(sent_new) - WINDOW_SIZE + 1):
+            feats_hashes = self._get_features_words_window(
+                sent_new[i:i + WINDOW_SIZE], stems_new[i:i + WINDOW_SIZE])
             hashes_matrix.append(feats_hashes)
 
         return hashes_matrix
 
-    def _get_features_matrix(self, words: t.List[str]):
-        indptr, indices = [0], []
-        data = []
-        words_counter = 0
-        for feats_ids in self._get_features_sent(words):
-            for feat_id in feats_ids:
-                indices.append(feat_id)
-                data.append(1)
-            indptr.append(len(indices))
-
-        features_matrix = sprs.csr_matrix((data, indices, indptr),
-                                          shape=(len(words), FEATURES_COUNT))
-
-        return features_matrix
+    def _get_features_ids(self, sents: t.List[t.List[str]],
+                          stems: t.List[t.List[str]]=None
+                          ) -> t.Tuple[np.ndarray, np.ndarray]:
+        if stems is None:
+            stems = [None] * len(sents)
 
-    def tag(self, words: t.List[str]) -> t.List[POSTag]:
-        features_matrix = self._get_features_matrix(words)
-        predictions = features_matrix.dot(self.coef_) + self.intercept_
-
-        predictions = np.asarray(predictions)
-        tags = [POSTag(i) for i in predictions.argmax(axis=1)]
-
-        return tags
+        indptr, indices = [0], []
+        for words, words_stems in zip(sents, stems):
+            for feats_ids in self._get_features_sent(words, words_stems):
+                indices.extend(feats_ids)
+                indptr.append(len(indices))
+
+        return (np.array(indices, dtype=np.int64),
+                np.array(indptr, dtype=np.int64))
+
+    def _predict_sparse(self, sents: t.List[t.List[str]],
+                        stems: t.List[t.List[str]]=None) -> np.ndarray:
+        """
+            Sum weights rows of every token's features, gathered from
+            CSR arrays, so that memory-mapped or quantized weights are
+            never copied or upcast as a whole. Sums are accumulated in
+            float64 in the same order as sparse matrices product does.
+        """
+        indices, indptr = self._get_features_ids(sents, stems)
+        n_tokens, n_classes = len(indptr) - 1, len(self.intercept_)
+        coef = self.coef_
+
+        starts = coef.indptr[indices].astype(np.int64)
+        counts = coef.indptr[indices + 1] - starts
+        positions = np.arange(counts.sum()) + np.repeat(
+            starts - (np.cumsum(counts) - counts), counts)
+
+        tokens = np.repeat(np.repeat(np.arange(n_tokens), np.diff(indptr)),
+                           counts)
+        cells = tokens * n_classes + coef.indices[positions]
+        predictions = np.bincount(cells, weights=coef.data[positions],
+                                  minlength=n_tokens * n_classes)
+
+        return predictions.reshape(n_tokens, n_classes)
+
+    def _predict_dense(self, sents: t.List[t.List[str]],
+                       stems: t.List[t.List[str]]=None) -> np.ndarray:
+        """
+            Sum weights rows of every token's features, accumulating in
+            the same order and precision as `_predict_sparse` does.
+        """
+        indices, indptr = self._get_features_ids(sents, stems)
+        if len(indptr) == 1:
+            return np.empty((0, len(self.intercept_)))
+
+        weights = self.table_[self.rows_map_[indices]]
+        predictions = np.add.reduceat(weights, indptr[:-1], axis=0,
+                                      dtype=np.float64)
+        if self.coef_scale_ is not None:
+            predictions *= self.coef_scale_
+
+        return predictions + self.intercept_
+
+    def _predict(self, sents: t.List[t.List[str]],
+                 stems: t.List[t.List[str]]=None) -> np.ndarray:
+        if self.dense:
+            return self._predict_dense(sents, stems)
+
+        predictions = self._predict_sparse(sents, stems)
+        if self.coef_scale_ is not None:
+            # quantized weights of every class are scaled by one factor
+            predictions *= self.coef_scale_
+
+        return predictions + self.intercept_
+
+    def tag(self, words: t.List[str], stems: t.List[str]=None
+            ) -> t.List[POSTag]:
+        return self.tag_many([words], None if stems is None else [stems])[0]
+
+    def tag_many(self, sents: t.List[t.List[str]],
+                 stems: t.List[t.List[str]]=None
+                 ) -> t.List[t.List[POSTag]]:
+        """
+            Tag several token lists with a single weights product.
+            `stems` are stems of lowercased words made by tagger's
+            stemmer, which spares stemming words once more.
+        """
+        predictions = self._predict(sents, stems).argmax(axis=1)
+        tags = [POS_TAGS[i] for i in predictions]
+
+        tagged = []
+        offset = 0
+        for words in sents:
+            tagged.append(tags[offset: offset + len(words)])
+            offset += len(words)
+
+        return tagged
+
+
+def load_mmap_weights(data_dir: str, n_classes: int) -> sprs.csr_matrix:
+    """
+        Weights matrix over read-only memory-mapped CSR arrays.
+    """
+    data, indices, indptr = [
+        np.load(os.path.join(data_dir, name), mmap_mode='r')
+        for name in (COEF_DATA_FILE, COEF_INDICES_FILE, COEF_INDPTR_FILE)]
+    if data.dtype == np.float16:
+        # scipy.sparse has no float16 support, so such weights only save
+        # disk space and are upcast in memory
+        data = data.astype(np.float32)
+
+    return sprs.csr_matrix((data, indices, indptr),
+                           shape=(len(indptr) - 1, n_classes), copy=False)
+
+
+def build_dense_weights(coef) -> t.Tuple[np.ndarray, np.ndarray]:
+    """
+        Compact sparse weights into a dense table of non-empty rows.
+        Returns map from feature id to table row and the table itself,
+        where the first row is zeros for features without weights.
+    """
+    coef = sprs.csr_matrix(coef)
+    rows = np.flatnonzero(np.diff(coef.indptr))
+
+    table = np.zeros((len(rows) + 1, coef.shape[1]), dtype=coef.dtype)
+    table[1:] = coef[rows].toarray()
+
+    rows_map = np.zeros(coef.shape[0], dtype=np.int32)
+    rows_map[rows] = np.arange(1, len(rows) + 1, dtype=np.int32)
+
+    return rows_map, table
 
 
 def get_basic_features(word):
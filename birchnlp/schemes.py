@@ -1,5 +1,6 @@
 
 from birchnlp.pos_tagger.schemes import POSTag
+from birchnlp.utils import get_str_fingerprint
 
 
 class Token:
@@ -13,7 +14,7 @@ class Token:
         self.start = start
         self.end = start + len(token)
         self.tok_pos = tok_pos
-        self._hash = hash(token)
+        self._fingerprint = None
 
     def __copy__(self):
         return Token(self.token, self.pos, self.stem,
@@ -22,17 +23,27 @@ class Token:
     def __len__(self):
         return len(self.token)
 
+    @property
+    def fingerprint(self) -> int:
+        """
+            Stable hash of token string.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = get_str_fingerprint(self.token)
+        return self._fingerprint
+
     def __hash__(self):
-        return self._hash
+        return self.fingerprint
 
     def __eq__(self, tok2):
-        return self._hash == tok2._hash and self.token == tok2.token
+        return self.token == tok2.token
 
     def __ne__(self, tok2):
-        return self._hash != tok2._hash or self.token != tok2.token
+        return self.token != tok2.token
 
     def __repr__(self):
-        return (f"<Token(token={self.token}, pos={self.pos.name}, "
+        pos = self.pos.name if self.pos is not None else None
+        return (f"<Token(token={self.token}, pos={pos}, "
                 f"stem={self.stem}, start={self.start}, end={self.end})>")
 
     def __str__(self):
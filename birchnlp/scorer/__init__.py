@@ -1 +1,2 @@
 from .literals_scorer import LiteralScorer
+from .corpus_scorer import CorpusLiteralScorer
@@ -0,0 +1,205 @@
+import typing as t
+
+import numpy as np
+
+from birchnlp.birch import Birch
+from birchnlp.scorer.literals_scorer import (
+    LiteralScorer, DEFAULT_PERCENTILE, VALID_POS_IDS, intern_literals,
+    get_stems_scores, sum_by_positions)
+
+
+STEM_DTYPE = np.int64
+COUNT_DTYPE = np.int64
+
+
+class CorpusLiteralScorer(LiteralScorer):
+    """
+        Literal scorer over statistics of a whole corpus. Statistics
+        are accumulated by `partial_fit`, merged between workers with
+        `merge` and stored with `save`. Literals are scored as if they
+        were added to the corpus, in time linear in their size.
+
+        As in `LiteralScorer`, stems statistics are counted over unique
+        literals: tokens of literal, seen for the first time, add their
+        stems frequencies, if POS is valid, and degrees.
+    """
+
+    def __init__(self, percentile: int=DEFAULT_PERCENTILE, topn: int=0):
+        super().__init__(percentile, topn, vectorized=True)
+
+        self.stems_ids_ = {}
+        self.stems_freqs_ = np.zeros(0, dtype=COUNT_DTYPE)
+        self.stems_degrees_ = np.zeros(0, dtype=COUNT_DTYPE)
+
+        self.literals_ids_ = {}
+        self.literals_freqs_ = np.zeros(0, dtype=COUNT_DTYPE)
+        self.literals_stems_ = []
+        self.literals_valid_ = []
+
+    def partial_fit(self, literals: t.List[Birch]) -> "CorpusLiteralScorer":
+        literals_ids, _, stems, pos_ids, local_stems = intern_literals(
+            literals)
+        stems_map = self._intern_stems(local_stems)
+
+        self._add_literals([stems_map[lit_stems] for lit_stems in stems],
+                           [np.isin(lit_pos, VALID_POS_IDS)
+                            for lit_pos in pos_ids],
+                           np.bincount(literals_ids))
+        return self
+
+    def merge(self, other: "CorpusLiteralScorer") -> "CorpusLiteralScorer":
+        """
+            Add statistics of other scorer, e.g. fitted by other worker.
+        """
+        stems_map = self._intern_stems(list(other.stems_ids_))
+
+        self._add_literals([stems_map[lit_stems]
+                            for lit_stems in other.literals_stems_],
+                           other.literals_valid_,
+                           other.literals_freqs_[:len(other.literals_ids_)])
+        return self
+
+    def _intern_stems(self, stems: t.List[str]) -> np.ndarray:
+        stems_map = np.array([self.stems_ids_.setdefault(stem,
+                                                         len(self.stems_ids_))
+                              for stem in stems], dtype=STEM_DTYPE)
+
+        self.stems_freqs_ = grow(self.stems_freqs_, len(self.stems_ids_))
+        self.stems_degrees_ = grow(self.stems_degrees_, len(self.stems_ids_))
+
+        return stems_map
+
+    def _add_literals(self, literals_stems: t.List[np.ndarray],
+                      literals_valid: t.List[np.ndarray],
+                      literals_freqs: np.ndarray):
+        """
+            Count literals given by their stems ids and flags of valid
+            POS of tokens. Stems statistics are updated by new literals.
+        """
+        literals_ids = np.empty(len(literals_stems), dtype=np.int64)
+        new_stems, new_valid = [], []
+
+        for i, (stems, valid) in enumerate(zip(literals_stems,
+                                               literals_valid)):
+            literal_id = self.literals_ids_.setdefault(
+                stems.tobytes(), len(self.literals_ids_))
+            if literal_id == len(self.literals_stems_):
+                self.literals_stems_.append(stems)
+                self.literals_valid_.append(valid)
+                new_stems.append(stems)
+                new_valid.append(valid)
+            literals_ids[i] = literal_id
+
+        self.literals_freqs_ = grow(self.literals_freqs_,
+                                    len(self.literals_ids_))
+        np.add.at(self.literals_freqs_, literals_ids, literals_freqs)
+
+        if not new_stems:
+            return
+
+        lengths = np.array([len(stems) for stems in new_stems])
+        stems = np.concatenate(new_stems)
+        valid = np.concatenate(new_valid)
+
+        np.add.at(self.stems_freqs_, stems[valid], 1)
+        np.add.at(self.stems_degrees_, stems, np.repeat(lengths - 1, lengths))
+
+    def assign_scores(self, literals: t.List[Birch]
+                      ) -> t.List[t.Tuple[Birch, float]]:
+        # a single literal is scored against corpus as well
+        if not literals:
+            return []
+
+        return self._assign_scores_vectorized(literals)
+
+    def _assign_scores_vectorized(self, literals: t.List[Birch]
+                                  ) -> t.List[t.Tuple[Birch, float]]:
+        literals_ids, first_literals, stems, pos_ids, local_stems = (
+            intern_literals(literals))
+
+        # corpus ids of literals stems, -1 for unseen ones
+        stems_map = np.array([self.stems_ids_.get(stem, -1)
+                              for stem in local_stems], dtype=STEM_DTYPE)
+
+        corpus_ids = np.full(len(stems), -1, dtype=np.int64)
+        for i, lit_stems in enumerate(stems):
+            corpus_stems = stems_map[lit_stems]
+            if (corpus_stems >= 0).all():
+                corpus_ids[i] = self.literals_ids_.get(corpus_stems.tobytes(),
+                                                       -1)
+        known = corpus_ids >= 0
+
+        literals_freqs = np.bincount(literals_ids)
+        literals_freqs[known] += self.literals_freqs_[corpus_ids[known]]
+
+        lengths = np.array([len(lit_stems) for lit_stems in stems])
+        stems = np.concatenate(stems)
+        new = np.repeat(~known, lengths)
+        valid = np.isin(np.concatenate(pos_ids), VALID_POS_IDS)
+
+        # corpus statistics of stems plus ones of literals new to corpus
+        freqs = np.bincount(stems[new & valid], minlength=len(local_stems))
+        degrees = np.bincount(stems[new],
+                              weights=np.repeat(lengths - 1, lengths)[new],
+                              minlength=len(local_stems))
+        seen = stems_map >= 0
+        freqs[seen] += self.stems_freqs_[stems_map[seen]]
+        degrees[seen] += self.stems_degrees_[stems_map[seen]]
+
+        token_scores = get_stems_scores(freqs, degrees)[stems]
+        scores = sum_by_positions(token_scores, lengths)
+        scores *= np.log(literals_freqs)
+
+        # nothing to select from and to shift scores by
+        if len(scores) == 1:
+            return [(literals[first_literals[0]], float(scores[0]))]
+
+        return self._select_literals(literals, first_literals, scores)
+
+    def save(self, path: str):
+        """
+            Save statistics to `.npz` arrays file.
+        """
+        lengths = np.array([len(stems) for stems in self.literals_stems_],
+                           dtype=np.int32)
+        np.savez_compressed(
+            path,
+            stems=np.array(list(self.stems_ids_), dtype=str),
+            literals_lengths=lengths,
+            literals_stems=concatenate(self.literals_stems_, STEM_DTYPE),
+            literals_valid=concatenate(self.literals_valid_, bool),
+            literals_freqs=self.literals_freqs_[:len(self.literals_ids_)])
+
+    @classmethod
+    def load(cls, path: str, percentile: int=DEFAULT_PERCENTILE,
+             topn: int=0) -> "CorpusLiteralScorer":
+        scorer = cls(percentile, topn)
+        with np.load(path, allow_pickle=False) as data:
+            scorer._intern_stems(data['stems'].tolist())
+            if not len(data['literals_lengths']):
+                return scorer
+
+            splits = np.cumsum(data['literals_lengths'])[:-1]
+            scorer._add_literals(
+                np.split(data['literals_stems'].astype(STEM_DTYPE), splits),
+                np.split(data['literals_valid'], splits),
+                data['literals_freqs'])
+
+        return scorer
+
+
+def grow(array: np.ndarray, size: int) -> np.ndarray:
+    """
+        Array of at least `size` items, new ones are zeros. Capacity is
+        doubled, so that growing by small steps takes linear time.
+    """
+    if size <= len(array):
+        return array
+
+    grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def concatenate(arrays: t.List[np.ndarray], dtype) -> np.ndarray:
+    return np.concatenate(arrays) if arrays else np.zeros(0, dtype=dtype)
@@ -15,13 +15,16 @@ IMPORTANT_PUNCT_RE = re.compile(r"-/\\")
 DEFAULT_PERCENTILE = 20
 
 VALID_POS_TAGS = {POSTag.NOUN, POSTag.ADJ, POSTag.NUM, POSTag.VERB, POSTag.AUX}
+VALID_POS_IDS = sorted(tag.value for tag in VALID_POS_TAGS)
 
 
 class LiteralScorer:
 
-    def __init__(self, percentile: int=DEFAULT_PERCENTILE, topn: int=0):
+    def __init__(self, percentile: int=DEFAULT_PERCENTILE, topn: int=0,
+                 vectorized: bool=True):
         self.percentile = percentile
         self.topn = topn
+        self.vectorized = vectorized
 
     def assign_scores(self, literals: t.List[Birch]
                       ) -> t.List[t.Tuple[Birch, float]]:
@@ -31,6 +34,9 @@ class LiteralScorer:
         if len(literals) == 1:
             return [(lit, 1.) for lit in literals]
 
+        if self.vectorized:
+            return self._assign_scores_vectorized(literals)
+
         wrapped_literals = [LiteralWrapper(l) for l in literals]
 
         literals_freq = Counter(wrapped_literals)
@@ -78,9 +84,145 @@ class LiteralScorer:
                 tokens_degree[token.stem] += degree
 
         token_scores = {}
-        total_tokens_count = len(list(tokens_freqs.elements()))
         for token, token_freq in tokens_freqs.items():
             token_scores[token] = (
                 token_freq + tokens_degree[token]) / token_freq
 
         return token_scores
+
+    def _assign_scores_vectorized(self, literals: t.List[Birch]
+                                  ) -> t.List[t.Tuple[Birch, float]]:
+        """
+            Same scores as of `assign_scores`, computed over ids of
+            interned stems and literals. Floating point operations are
+            done in the same order to get exactly the same values.
+        """
+        literals_ids, first_literals, stems, pos_ids, _ = intern_literals(
+            literals)
+        literals_freqs = np.bincount(literals_ids)
+
+        lengths = np.array([len(lit_stems) for lit_stems in stems])
+        stems = np.concatenate(stems)
+        pos_ids = np.concatenate(pos_ids)
+
+        token_scores = get_token_scores(stems, pos_ids, lengths)[stems]
+        scores = sum_by_positions(token_scores, lengths)
+        scores *= np.log(literals_freqs)
+
+        return self._select_literals(literals, first_literals, scores)
+
+    def _select_literals(self, literals: t.List[Birch],
+                         first_literals: t.List[int], scores: np.ndarray
+                         ) -> t.List[t.Tuple[Birch, float]]:
+        """
+            Best scored unique literals, represented by their first
+            occurrences, in order of `assign_scores`.
+        """
+        min_score = abs(scores.min())
+
+        if self.topn > 0:
+            selected = top_indices(scores, self.topn)
+        else:
+            try:
+                percentile_value = np.percentile(scores, self.percentile)
+            except IndexError:
+                percentile_value = -1e10
+            selected = np.flatnonzero(scores > percentile_value)
+
+        # stable sort keeps literals with equal scores in text order
+        order = selected[np.argsort(-scores[selected], kind='mergesort')]
+
+        return [(literals[first_literals[i]], scores[i] + min_score)
+                for i in order.tolist()]
+
+
+def intern_literals(literals: t.List[Birch]) -> tuple:
+    """
+        Ids of literals, interned by their stems, indices of their first
+        occurrences, ids of stems and POS of every unique literal and
+        interned stems.
+    """
+    stems_ids = {}
+    storages_stems = {}
+    unique_ids = {}
+    literals_ids = np.empty(len(literals), dtype=np.int64)
+    first_literals, stems, pos_ids = [], [], []
+
+    for i, literal in enumerate(literals):
+        storage = literal.storage_
+        if id(storage) not in storages_stems:
+            storages_stems[id(storage)] = (storage, np.array(
+                [stems_ids.setdefault(stem, len(stems_ids))
+                 for stem in storage.stems], dtype=np.int64))
+        stems_map = storages_stems[id(storage)][1]
+
+        literal_stems = stems_map[storage.stem_ids[literal.start_:
+                                                   literal.stop_]]
+        literal_id = unique_ids.setdefault(literal_stems.tobytes(),
+                                           len(unique_ids))
+        if literal_id == len(first_literals):
+            first_literals.append(i)
+            stems.append(literal_stems)
+            pos_ids.append(storage.pos_ids[literal.start_: literal.stop_])
+        literals_ids[i] = literal_id
+
+    return literals_ids, first_literals, stems, pos_ids, list(stems_ids)
+
+
+def get_token_scores(stems: np.ndarray, pos_ids: np.ndarray,
+                     lengths: np.ndarray) -> np.ndarray:
+    """
+        Scores of stems ids: frequency in unique literals, where stem
+        has valid POS, plus degree, divided by the frequency.
+    """
+    stems_count = stems.max() + 1 if len(stems) else 0
+    valid = np.isin(pos_ids, VALID_POS_IDS)
+
+    tokens_freqs = np.bincount(stems[valid], minlength=stems_count)
+    tokens_degree = np.bincount(stems, weights=np.repeat(lengths - 1,
+                                                         lengths),
+                                minlength=stems_count)
+
+    return get_stems_scores(tokens_freqs, tokens_degree)
+
+
+def get_stems_scores(freqs: np.ndarray, degrees: np.ndarray) -> np.ndarray:
+    scores = np.zeros(len(freqs))
+    scored = freqs > 0
+    scores[scored] = (freqs[scored] + degrees[scored]) / freqs[scored]
+
+    return scores
+
+
+def sum_by_positions(values: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+        Sums of consecutive groups of `lengths` values. Values are added
+        position by position, in the same order as Python loop does.
+    """
+    owners = np.repeat(np.arange(len(lengths)), lengths)
+    positions = np.arange(len(values)) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths)
+
+    matrix = np.zeros((len(lengths), lengths.max() if len(lengths) else 0))
+    matrix[owners, positions] = values
+
+    sums = np.zeros(len(lengths))
+    for column in matrix.T:
+        sums += column
+
+    return sums
+
+
+def top_indices(scores: np.ndarray, topn: int) -> np.ndarray:
+    """
+        Indices of `topn` largest scores, earliest ones among equal
+        scores on the boundary, as stable sort would take.
+    """
+    if topn >= len(scores):
+        return np.arange(len(scores))
+
+    threshold = scores[np.argpartition(-scores, topn - 1)[topn - 1]]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:topn - len(above)]
+
+    return np.concatenate([above, ties])
@@ -1,6 +1,7 @@
 import typing as t
 
 from birchnlp.birch import Birch
+from birchnlp.utils import get_str_fingerprint
 
 
 class LiteralWrapper:
@@ -8,7 +9,7 @@ class LiteralWrapper:
     def __init__(self, literal: Birch):
         self.literal = literal
         self.stem = ' '.join([tok.stem for tok in literal])
-        self._hash = hash(self.stem)
+        self.fingerprint = get_str_fingerprint(self.stem)
 
     def __iter__(self):
         for tok in self.literal:
@@ -18,13 +19,13 @@ class LiteralWrapper:
         return len(self.literal)
 
     def __hash__(self):
-        return self._hash
+        return self.fingerprint
 
     def __eq__(self, lit):
-        return hash(self) == hash(lit) and self.stem == lit.stem
+        return self.fingerprint == lit.fingerprint and self.stem == lit.stem
 
-    def __ne__(self, kw):
-        return hash(self) != hash(lit) or self.stem != lit.stem
+    def __ne__(self, lit):
+        return self.fingerprint != lit.fingerprint or self.stem != lit.stem
 
     def __repr__(self):
         return f"<LiteralWrapper(stem={self.stem})>"
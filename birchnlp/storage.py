@@ -0,0 +1,305 @@
+import typing as t
+import struct
+
+import numpy as np
+
+from birchnlp.pos_tagger.schemes import POSTag
+from birchnlp.schemes import Token
+from birchnlp.tokenizer.tokenizer import get_sentences_offsets
+from birchnlp.utils import ENCODING_ERRORS, get_fingerprint
+
+
+POS_TAGS = list(POSTag)
+NO_POS_ID = 255
+
+OFFSET_DTYPE = np.int32
+POS_DTYPE = np.uint8
+STEM_DTYPE = np.int32
+STEM_LEN_DTYPE = np.uint32
+
+# Record header: magic, format version, flags, tokens, stems and
+# sentences offsets counts, sizes of UTF-8 encoded text and stems
+RECORD_MAGIC = b"BRCH"
+RECORD_VERSION = 3
+RECORD_HEADER = struct.Struct("<4sHHIIIII")
+SHARED_STARTS_FLAG = 1
+TOK_POSITIONS_FLAG = 2
+
+
+class TokenStorage:
+    """
+        Columnar storage of document tokens: text buffer, NumPy arrays of
+        tokens offsets, POS ids, space flags and ids in interned stems
+        table. `Token` objects are materialized only on access.
+
+        `starts` and `ends` are tokens offsets in the document, while
+        `text_starts` are offsets of tokens strings in the text buffer.
+        For documents built from text both are the same array.
+
+        `sentences_offsets` are sorted indices of tokens, which start
+        new sentences. `tok_positions` are indices of tokens in their
+        original document, None if they are the same as in storage.
+    """
+
+    def __init__(self, text: str, starts: np.ndarray, ends: np.ndarray,
+                 text_starts: np.ndarray, pos_ids: np.ndarray,
+                 spaces: np.ndarray, stem_ids: np.ndarray,
+                 stems: t.List[str], sentences_offsets: np.ndarray,
+                 tok_positions: np.ndarray=None):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        self.text_starts = text_starts
+        self.pos_ids = pos_ids
+        self.spaces = spaces
+        self.stem_ids = stem_ids
+        self.stems = stems
+        self.sentences_offsets = sentences_offsets
+        self.tok_positions = tok_positions
+
+    @classmethod
+    def build(cls, text: str, spans: t.List[t.Tuple[int, int]],
+              spaces: t.List[bool], tags: t.List[POSTag],
+              stems: t.List[str], sentences_offsets: t.List[int]
+              ) -> "TokenStorage":
+        """
+            Storage of tokens of text, found at `spans` by tokenizer.
+        """
+        spans = np.array(spans, dtype=OFFSET_DTYPE).reshape(-1, 2)
+        starts = np.ascontiguousarray(spans[:, 0])
+        ends = np.ascontiguousarray(spans[:, 1])
+
+        return cls._from_columns(text, starts, ends, starts, tags, spaces,
+                                 stems, sentences_offsets)
+
+    @classmethod
+    def from_tokens(cls, tokens: t.List[Token]) -> "TokenStorage":
+        text = "".join([tok.token for tok in tokens])
+
+        lengths = np.array([len(tok) for tok in tokens], dtype=OFFSET_DTYPE)
+        text_starts = np.zeros(len(tokens), dtype=OFFSET_DTYPE)
+        np.cumsum(lengths[:-1], out=text_starts[1:])
+        starts = np.array([tok.start for tok in tokens], dtype=OFFSET_DTYPE)
+
+        spaces = [tok.space for tok in tokens]
+        sentences_offsets = get_sentences_offsets(
+            [tok.token for tok in tokens], spaces)
+
+        tok_positions = np.array([tok.tok_pos for tok in tokens],
+                                 dtype=OFFSET_DTYPE)
+
+        return cls._from_columns(text, starts, starts + lengths, text_starts,
+                                 [tok.pos for tok in tokens], spaces,
+                                 [tok.stem for tok in tokens],
+                                 sentences_offsets, tok_positions)
+
+    @classmethod
+    def _from_columns(cls, text: str, starts: np.ndarray, ends: np.ndarray,
+                      text_starts: np.ndarray, tags: t.List[POSTag],
+                      spaces: t.List[bool], stems: t.List[str],
+                      sentences_offsets: t.List[int],
+                      tok_positions: np.ndarray=None) -> "TokenStorage":
+        pos_ids = np.array([NO_POS_ID if tag is None else tag.value
+                            for tag in tags], dtype=POS_DTYPE)
+
+        stems_ids = {}
+        stem_ids = np.array([stems_ids.setdefault(stem, len(stems_ids))
+                             for stem in stems], dtype=STEM_DTYPE)
+
+        return cls(text, starts, ends, text_starts, pos_ids,
+                   np.array(spaces, dtype=bool), stem_ids, list(stems_ids),
+                   np.array(sentences_offsets, dtype=OFFSET_DTYPE),
+                   tok_positions)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def token(self, index: int) -> Token:
+        start = int(self.starts[index])
+        text_start = int(self.text_starts[index])
+        text_end = text_start + int(self.ends[index]) - start
+        pos_id = int(self.pos_ids[index])
+
+        return Token(self.text[text_start: text_end],
+                     None if pos_id == NO_POS_ID else POS_TAGS[pos_id],
+                     self.stems[self.stem_ids[index]],
+                     bool(self.spaces[index]), start, self.tok_pos(index))
+
+    def tok_pos(self, index: int) -> int:
+        if self.tok_positions is None:
+            return index
+        return int(self.tok_positions[index])
+
+    def tokens(self, start: int, stop: int) -> t.List[Token]:
+        """
+            Materialize tokens of [start, stop) range at once.
+        """
+        columns = zip(self.starts[start: stop].tolist(),
+                      self.ends[start: stop].tolist(),
+                      self.text_starts[start: stop].tolist(),
+                      self.pos_ids[start: stop].tolist(),
+                      self.spaces[start: stop].tolist(),
+                      self.stem_ids[start: stop].tolist())
+        if self.tok_positions is None:
+            positions = range(start, stop)
+        else:
+            positions = self.tok_positions[start: stop].tolist()
+
+        text, stems = self.text, self.stems
+        return [Token(text[text_start: text_start + end - tok_start],
+                      None if pos_id == NO_POS_ID else POS_TAGS[pos_id],
+                      stems[stem_id], space, tok_start, tok_pos)
+                for tok_pos, (tok_start, end, text_start, pos_id, space,
+                              stem_id) in zip(positions, columns)]
+
+    def token_strings(self, start: int, stop: int) -> t.List[str]:
+        lengths = self.ends[start: stop] - self.starts[start: stop]
+
+        text = self.text
+        return [text[text_start: text_start + length]
+                for text_start, length in zip(
+                    self.text_starts[start: stop].tolist(), lengths.tolist())]
+
+    def fingerprint(self, start: int, stop: int) -> int:
+        """
+            Stable hash of tokens strings of [start, stop) range: their
+            concatenation plus lengths, which tell tokens apart.
+        """
+        lengths = self.ends[start: stop] - self.starts[start: stop]
+        text = "".join(self.token_strings(start, stop))
+
+        return get_fingerprint(text.encode("utf-8", ENCODING_ERRORS),
+                               lengths.astype("<i4").tobytes())
+
+    def sentences_offsets_range(self, start: int, stop: int) -> np.ndarray:
+        """
+            Offsets of sentences, which start inside (start, stop) range
+            of tokens. Range reaching document end keeps its boundary.
+        """
+        offsets = self.sentences_offsets
+        lo = np.searchsorted(offsets, start, side='right')
+        hi = len(offsets) if stop == len(self) else np.searchsorted(
+            offsets, stop, side='left')
+
+        return offsets[lo: hi]
+
+    def slice(self, start: int, stop: int) -> "TokenStorage":
+        """
+            Compact copy of [start, stop) tokens range with only their
+            text and stems. Tokens keep their offsets and positions in
+            the document.
+        """
+        if start == 0 and stop == len(self):
+            return self
+
+        starts = self.starts[start: stop].copy()
+        ends = self.ends[start: stop].copy()
+        text_starts = self.text_starts[start: stop]
+
+        text_start = text_end = 0
+        if len(starts):
+            text_start = int(text_starts[0])
+            text_end = int(text_starts[-1] + ends[-1] - starts[-1])
+
+        stems_ids, stem_ids = np.unique(self.stem_ids[start: stop],
+                                        return_inverse=True)
+
+        if self.tok_positions is None:
+            tok_positions = np.arange(start, stop, dtype=OFFSET_DTYPE)
+        else:
+            tok_positions = self.tok_positions[start: stop].copy()
+
+        return TokenStorage(self.text[text_start: text_end], starts, ends,
+                            text_starts - text_start,
+                            self.pos_ids[start: stop].copy(),
+                            self.spaces[start: stop].copy(),
+                            stem_ids.astype(STEM_DTYPE),
+                            [self.stems[i] for i in stems_ids.tolist()],
+                            self.sentences_offsets_range(start, stop) - start,
+                            tok_positions)
+
+    def to_bytes(self) -> bytes:
+        """
+            Serialize storage to binary record: header, int32 and then
+            byte-sized columns, UTF-8 text and stems. Columns come first
+            to be properly aligned for `from_bytes`.
+        """
+        shared_starts = self.text_starts is self.starts
+        text = self.text.encode("utf-8", ENCODING_ERRORS)
+        stems = [stem.encode("utf-8", ENCODING_ERRORS) for stem in self.stems]
+
+        flags = SHARED_STARTS_FLAG if shared_starts else 0
+        if self.tok_positions is not None:
+            flags |= TOK_POSITIONS_FLAG
+
+        header = RECORD_HEADER.pack(
+            RECORD_MAGIC, RECORD_VERSION, flags,
+            len(self), len(stems), len(self.sentences_offsets), len(text),
+            sum(map(len, stems)))
+
+        columns = [self.starts.astype(OFFSET_DTYPE, copy=False),
+                   self.ends.astype(OFFSET_DTYPE, copy=False)]
+        if not shared_starts:
+            columns.append(self.text_starts.astype(OFFSET_DTYPE, copy=False))
+        if self.tok_positions is not None:
+            columns.append(self.tok_positions.astype(OFFSET_DTYPE,
+                                                     copy=False))
+        columns += [self.stem_ids.astype(STEM_DTYPE, copy=False),
+                    self.sentences_offsets.astype(OFFSET_DTYPE, copy=False),
+                    np.array([len(stem) for stem in stems],
+                             dtype=STEM_LEN_DTYPE),
+                    self.pos_ids.astype(POS_DTYPE, copy=False),
+                    self.spaces.astype(bool, copy=False)]
+
+        return b"".join([header] + [col.tobytes() for col in columns] +
+                        [text] + stems)
+
+    @classmethod
+    def from_bytes(cls, data) -> "TokenStorage":
+        """
+            Load storage from `to_bytes` record. Columns are read-only
+            views of `data`, which may be bytes, memoryview or mmap.
+        """
+        (magic, version, flags, count, stems_count, sentences_count,
+         text_size, stems_size) = RECORD_HEADER.unpack_from(data)
+        if magic != RECORD_MAGIC or version != RECORD_VERSION:
+            raise ValueError("Not a token storage record")
+
+        offset = RECORD_HEADER.size
+
+        def read(dtype, size=count):
+            nonlocal offset
+            column = np.frombuffer(data, dtype=dtype, count=size,
+                                   offset=offset)
+            offset += column.nbytes
+            return column
+
+        starts = read(OFFSET_DTYPE)
+        ends = read(OFFSET_DTYPE)
+        if flags & SHARED_STARTS_FLAG:
+            text_starts = starts
+        else:
+            text_starts = read(OFFSET_DTYPE)
+        tok_positions = None
+        if flags & TOK_POSITIONS_FLAG:
+            tok_positions = read(OFFSET_DTYPE)
+        stem_ids = read(STEM_DTYPE)
+        sentences_offsets = read(OFFSET_DTYPE, sentences_count)
+        stems_lens = read(STEM_LEN_DTYPE, stems_count).tolist()
+        pos_ids = read(POS_DTYPE)
+        spaces = read(bool)
+
+        text = bytes(data[offset: offset + text_size])
+        text = text.decode("utf-8", ENCODING_ERRORS)
+        offset += text_size
+
+        stems_data = bytes(data[offset: offset + stems_size])
+        stems = []
+        stem_start = 0
+        for stem_len in stems_lens:
+            stem = stems_data[stem_start: stem_start + stem_len]
+            stems.append(stem.decode("utf-8", ENCODING_ERRORS))
+            stem_start += stem_len
+
+        return cls(text, starts, ends, text_starts, pos_ids, spaces,
+                   stem_ids, stems, sentences_offsets, tok_positions)
@@ -1 +1,2 @@
 from .tokenizer import get_tokenizer
+from .stream import iter_tokenize
@@ -1,37 +1,66 @@
 import re
-import sys
 import unicodedata
 
+from birchnlp.tokenizer import unicode_tables
 
-ALL_DASH_MARKS = r''.join([
-    chr(i) for i in range(sys.maxunicode)
-    if unicodedata.category(chr(i)) == 'Pd'
-])
 
-ALL_DASH_MARKS = re.escape(ALL_DASH_MARKS)
+if unicode_tables.UNIDATA_VERSION == unicodedata.unidata_version:
+    ALL_DASH_MARKS = unicode_tables.DASH_MARKS
+    ALL_QUOTATION_MARKS = unicode_tables.QUOTATION_MARKS
+else:
+    # Python ships other Unicode database, than tables were generated with
+    from birchnlp.tokenizer.unicode_tables_gen import load_tables
+    _tables = load_tables()
+    ALL_DASH_MARKS = _tables['DASH_MARKS']
+    ALL_QUOTATION_MARKS = _tables['QUOTATION_MARKS']
 
-ALL_QUOTATION_MARKS = r''.join([
-    chr(i) for i in range(sys.maxunicode)
-    if unicodedata.category(chr(i)) in ('Pi', 'Pf')
-])
+ALL_DASH_MARKS = re.escape(ALL_DASH_MARKS)
 
 ALL_QUOTATION_MARKS += "'\""
 ALL_QUOTATION_MARKS = re.escape(ALL_QUOTATION_MARKS)
 
 PUNCT = re.escape("\/[]()~:;_&*=^{<>}+%$#@!?.,′") + r"\s"
 INFIX_PUNCT = re.escape("!?&()[]+{}=<>~*%$#") + r"\s"
+EDGE_PUNCT = f"{ALL_DASH_MARKS}{ALL_QUOTATION_MARKS}{PUNCT}"
+
+# Regexes, which TOKENIZE_RE is built from
+AFFIX_ATTRS = ('SPACES_RE', 'PREFIX_RE', 'SUFFIX_RE', 'SUFFIX_SPACE_RE',
+               'INFIX_RE')
 
 
 class BasicTokenizingConfig:
-    SPECIFIC_TOKEN_RE = re.compile(r'~~specific_token_\d+~~')
     SPACES_RE = re.compile(r"[ \t]+")
+    TOKENIZE_RE = None
 
 
 class TokenizingConfig(BasicTokenizingConfig):
-    PREFIX_RE = re.compile(rf"^[{ALL_DASH_MARKS}{ALL_QUOTATION_MARKS}{PUNCT}]")
-    SUFFIX_RE = re.compile(rf"[{ALL_DASH_MARKS}{ALL_QUOTATION_MARKS}{PUNCT}]$")
+    PREFIX_RE = re.compile(rf"^[{EDGE_PUNCT}]")
+    SUFFIX_RE = re.compile(rf"[{EDGE_PUNCT}]$")
     SUFFIX_SPACE_RE = re.compile(r"\s")
     INFIX_RE = re.compile(rf"[{INFIX_PUNCT}]")
 
+    # Tokenizes whole text the same way as splitting it by SPACES_RE and
+    # stripping PREFIX_RE, SUFFIX_RE and INFIX_RE chars from every chunk:
+    # token is either a run without infix chars, which starts and ends
+    # with non-punctuation char, or a single char. Subclasses overriding
+    # those regexes fall back to chunk by chunk splitting, unless they
+    # define matching TOKENIZE_RE as well.
+    TOKENIZE_RE = re.compile(rf"[^{EDGE_PUNCT}]"
+                             rf"(?:[^{INFIX_PUNCT}]*[^{EDGE_PUNCT}])?"
+                             r"|[^ \t]")
+
     TOKENS_RE = None
+    # Matches first chars of TOKENS_RE tokens. Required by streaming
+    # tokenizer, when special tokens may contain whitespaces
+    TOKENS_START_RE = None
     SKIP_TOKENS_RE = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # class, which TOKENIZE_RE was defined for
+        owner = next(base for base in cls.__mro__
+                     if 'TOKENIZE_RE' in vars(base))
+        if any(getattr(cls, name) is not getattr(owner, name)
+               for name in AFFIX_ATTRS):
+            cls.TOKENIZE_RE = None
@@ -0,0 +1,164 @@
+import typing as t
+import collections
+
+from birchnlp.tokenizer.config import TokenizingConfig
+from birchnlp.tokenizer.tokenizer import tokenize_spans
+
+
+READ_SIZE = 1 << 16
+# Text without cut points is force tokenized after buffer grows that big
+MAX_BUFFER_SIZE = 1 << 22
+
+
+def iter_tokenize(source: t.Union[t.TextIO, t.Iterable[str]],
+                  config: TokenizingConfig=None,
+                  max_buffer_size: int=MAX_BUFFER_SIZE
+                  ) -> t.Iterator[t.Tuple[str, bool, int]]:
+    """
+        Lazily tokenize file-like object or iterator of text chunks,
+        yielding (token, space, start_offset) triples. Text is buffered
+        up to last whitespace, which is not a part of special token, so
+        memory stays bounded by chunks and tokens sizes. Tokens are the
+        same as of the whole text tokenized at once.
+    """
+    if config is None:
+        config = TokenizingConfig()
+
+    if isinstance(source, str):
+        chunks = iter([source])
+    elif hasattr(source, 'read'):
+        chunks = iter(lambda: source.read(READ_SIZE), '')
+    else:
+        chunks = iter(source)
+
+    buffer = ""
+    buffer_offset = 0
+    # text of whitespaces only has no tokens, even line breaks ones
+    has_text = False
+    cut_finder = CutFinder(config)
+    for chunk in chunks:
+        buffer += chunk
+        has_text = has_text or bool(chunk.strip())
+        if not has_text:
+            continue
+
+        cut = cut_finder.find(buffer)
+        if cut is None and len(buffer) > max_buffer_size:
+            cut = find_last_space(buffer, config)
+        if cut is None:
+            continue
+
+        piece_end, rest_start = cut
+        yield from tokenize_piece(buffer[:piece_end], buffer_offset, config,
+                                  piece_end != rest_start)
+        buffer = buffer[rest_start:]
+        buffer_offset += rest_start
+        cut_finder.drop(rest_start)
+
+    if has_text:
+        yield from tokenize_piece(buffer, buffer_offset, config, False)
+
+
+class CutFinder:
+    """
+        Finds the last whitespace run of growing buffer, after which
+        more text follows and which doesn't intersect special tokens,
+        including ones which may continue in next chunks. Every part of
+        buffer is scanned once, except for unterminated special tokens.
+
+        Special tokens, which contain whitespaces, may be split between
+        chunks only if config has TOKENS_START_RE: text is held from the
+        last start of special token, which is not matched yet.
+    """
+
+    def __init__(self, config: TokenizingConfig):
+        self.config = config
+        self.tokens_pos = 0
+        self.spaces_pos = 0
+        self.protected = collections.deque()
+        self.cut = None
+
+    def find(self, buffer: str) -> t.Optional[t.Tuple[int, int]]:
+        limit = self._scan_tokens(buffer)
+
+        for run in self.config.SPACES_RE.finditer(buffer, self.spaces_pos,
+                                                  limit):
+            if run.end() == len(buffer):
+                break
+            self.spaces_pos = run.end()
+
+            while self.protected and self.protected[0][1] <= run.start():
+                self.protected.popleft()
+            if not self.protected or run.end() <= self.protected[0][0]:
+                self.cut = run.span()
+
+        return self.cut
+
+    def _scan_tokens(self, buffer: str) -> int:
+        """
+            Collect complete special tokens, returns position, before
+            which buffer may be cut.
+        """
+        config = self.config
+        if not config.TOKENS_RE:
+            return len(buffer)
+
+        for match in config.TOKENS_RE.finditer(buffer, self.tokens_pos):
+            if match.end() == len(buffer):
+                self.tokens_pos = match.start()
+                return match.start()
+
+            if (config.TOKENS_START_RE is None and
+                    config.SPACES_RE.search(match.group())):
+                raise ValueError("Special token %r contains whitespaces, "
+                                 "set TOKENS_START_RE to tokenize stream "
+                                 "with such tokens" % match.group())
+            self.protected.append(match.span())
+            self.tokens_pos = match.end()
+
+        if config.TOKENS_START_RE is None:
+            return len(buffer)
+
+        # the last special token start may be terminated by next chunks
+        limit = len(buffer)
+        for start in config.TOKENS_START_RE.finditer(buffer, self.tokens_pos):
+            limit = start.start()
+        self.tokens_pos = limit
+
+        return limit
+
+    def drop(self, size: int):
+        """
+            Shift positions after `size` chars are dropped from buffer.
+        """
+        self.tokens_pos = max(self.tokens_pos - size, 0)
+        self.spaces_pos = max(self.spaces_pos - size, 0)
+        self.protected = collections.deque(
+            (start - size, end - size) for start, end in self.protected
+            if end > size)
+        self.cut = None
+
+
+def find_last_space(buffer: str, config: TokenizingConfig
+                    ) -> t.Tuple[int, int]:
+    """
+        Forced cut of buffer without cut points: the last whitespace
+        run, even if it may be a part of special token, or buffer end.
+    """
+    cut = len(buffer), len(buffer)
+    for run in config.SPACES_RE.finditer(buffer, 1):
+        if run.end() < len(buffer):
+            cut = run.span()
+
+    return cut
+
+
+def tokenize_piece(piece: str, offset: int, config: TokenizingConfig,
+                   last_space: bool) -> t.Iterator[t.Tuple[str, bool, int]]:
+    tokens, spaces, spans = tokenize_spans(piece, config)
+    # the last token of piece may be skipped by SKIP_TOKENS_RE
+    if tokens and spans[-1][1] == len(piece):
+        spaces[-1] = last_space
+
+    for token, space, (start, _) in zip(tokens, spaces, spans):
+        yield token, space, offset + start
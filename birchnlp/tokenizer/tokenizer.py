@@ -4,42 +4,100 @@ import itertools
 from birchnlp.tokenizer.config import TokenizingConfig
 
 
-def tokenize(sentence: str, key2equation: t.Dict[str, str],
-             config) -> t.List[str]:
+Span = t.Tuple[int, int]
+
+
+def tokenize(text: str, protected: t.List[Span], config
+             ) -> t.Tuple[t.List[str], t.List[bool], t.List[Span]]:
+    """
+        Split text by whitespaces and tokenize every chunk. `protected`
+        are sorted spans of special tokens, which are kept as is even if
+        contain whitespaces.
+    """
     tokenized = []
     spaces = []
+    spans = []
+
+    def add_sub_tokens(start: int, end: int):
+        sub_tokens = prepare_token(text[start: end], config)
+        for sub_token in sub_tokens:
+            spans.append((start, start + len(sub_token)))
+            start += len(sub_token)
+        tokenized.extend(sub_tokens)
+        spaces.extend([False] * len(sub_tokens))
+
+    span_ind = 0
+    for chunk_start, chunk_end in iter_chunks(text, protected, config):
+        last_pos = chunk_start
+        while span_ind < len(protected) and protected[span_ind][0] < chunk_end:
+            start, end = protected[span_ind]
+            span_ind += 1
+            if start != last_pos:
+                add_sub_tokens(last_pos, start)
+
+            last_pos = end
+
+            tokenized.append(text[start: end])
+            spaces.append(False)
+            spans.append((start, end))
+
+        if last_pos != chunk_end:
+            add_sub_tokens(last_pos, chunk_end)
 
-    for tok in config.SPACES_RE.split(sentence):
-        last_pos = 0
-        if config.SPECIFIC_TOKEN_RE.search(tok):
-            for iter_tok in config.SPECIFIC_TOKEN_RE.finditer(tok):
-                start, end = iter_tok.span()
-                if start != last_pos:
-                    sub_tokens = prepare_token(tok[last_pos: start], config)
-                    tokenized += sub_tokens
-                    spaces += [False] * len(sub_tokens)
-
-                last_pos = end
-
-                tokenized.append(iter_tok.group())
-                spaces.append(False)
-
-            if last_pos != len(tok):
-                sub_tokens = prepare_token(tok[last_pos:], config)
-                tokenized += sub_tokens
-                spaces += [False] * len(sub_tokens)
-
-        else:
-            sub_tokens = prepare_token(tok, config)
-            tokenized += sub_tokens
-            spaces += [False] * len(sub_tokens)
         if spaces:
             spaces[-1] = True
 
-    words = [key2equation.get(word, word) for word in tokenized]
     if spaces:
         spaces[-1] = False
-    return words, spaces
+    return tokenized, spaces, spans
+
+
+def tokenize_fast(text: str, protected: t.List[Span], config
+                  ) -> t.Tuple[t.List[str], t.List[bool], t.List[Span]]:
+    """
+        Same as `tokenize`, but finds tokens of the whole text with one
+        TOKENIZE_RE scan instead of splitting it chunk by chunk.
+    """
+    tokenized = []
+    spans = []
+
+    last_pos = 0
+    for start, end in itertools.chain(protected, [(len(text), len(text))]):
+        for match in config.TOKENIZE_RE.finditer(text, last_pos, start):
+            tokenized.append(match.group())
+            spans.append(match.span())
+
+        if start != end:
+            tokenized.append(text[start: end])
+            spans.append((start, end))
+        last_pos = end
+
+    spaces = [config.SPACES_RE.match(text, end) is not None
+              for _, end in spans]
+    if spaces:
+        spaces[-1] = False
+    return tokenized, spaces, spans
+
+
+def iter_chunks(text: str, protected: t.List[Span],
+                config) -> t.Iterator[Span]:
+    """
+        Spans of text between whitespace runs, which don't intersect
+        protected spans.
+    """
+    last_pos = 0
+    protected = iter(protected)
+    protected_span = next(protected, None)
+    for run in config.SPACES_RE.finditer(text):
+        while protected_span and protected_span[1] <= run.start():
+            protected_span = next(protected, None)
+        if protected_span and protected_span[0] < run.end():
+            continue
+
+        yield last_pos, run.start()
+        last_pos = run.end()
+
+    yield last_pos, len(text)
 
 
 def prepare_token(token: str, config) -> t.List[str]:
@@ -92,28 +150,69 @@ def get_tokenizer(config: TokenizingConfig=None) -> t.Callable:
     if config is None:
         config = TokenizingConfig()
 
-    def tokenize_text(text: str) -> t.Tuple[t.List[str], t.List[bool]]:
+    def tokenize_text(text: str, with_spans: bool=False) -> tuple:
+        """
+            Returns tokens and flags if they are followed by whitespace,
+            plus (start, end) offsets of tokens in text if `with_spans`.
+        """
         if not text.strip():
-            return [], []
-
-        key2equation = {}
-        if config.TOKENS_RE:
-            for i, eq in enumerate(config.TOKENS_RE.finditer(text)):
-                eq = eq.group(0)
-                key = f"~~specific_token_{i}~~"
-                text = text.replace(eq, key)
-                key2equation[key.strip()] = eq
-
-        tokens, spaces = tokenize(text, key2equation, config)
-        if config.SKIP_TOKENS_RE:
-            new_tokens, new_spaces = [], []
-            for tok, sp in zip(tokens, spaces):
-                if config.SKIP_TOKENS_RE.match(tok):
-                    continue
-                new_tokens.append(tok)
-                new_spaces.append(sp)
-            return new_tokens, new_spaces
+            return ([], [], []) if with_spans else ([], [])
 
+        tokens, spaces, spans = tokenize_spans(text, config)
+        if with_spans:
+            return tokens, spaces, spans
         return tokens, spaces
 
     return tokenize_text
+
+
+def tokenize_spans(text: str, config
+                   ) -> t.Tuple[t.List[str], t.List[bool], t.List[Span]]:
+    """
+        Tokens, spaces flags and spans of text. Unlike `get_tokenizer`
+        tokenizers, text of whitespaces only still gives line breaks
+        tokens, as it does as a part of longer text.
+    """
+    protected = []
+    if config.TOKENS_RE:
+        protected = [match.span()
+                     for match in config.TOKENS_RE.finditer(text)
+                     if match.end() > match.start()]
+
+    if config.TOKENIZE_RE is None:
+        tokens, spaces, spans = tokenize(text, protected, config)
+    else:
+        tokens, spaces, spans = tokenize_fast(text, protected, config)
+    if config.SKIP_TOKENS_RE:
+        new_tokens, new_spaces, new_spans = [], [], []
+        for tok, sp, span in zip(tokens, spaces, spans):
+            if config.SKIP_TOKENS_RE.match(tok):
+                continue
+            new_tokens.append(tok)
+            new_spaces.append(sp)
+            new_spans.append(span)
+        tokens, spaces, spans = new_tokens, new_spaces, new_spans
+
+    return tokens, spaces, spans
+
+
+def get_sentences_offsets(tokens: t.List[str],
+                          spaces: t.List[bool]) -> t.List[int]:
+    """
+        Indices of tokens, which start new sentences: tokens after
+        sentence-final punctuation followed by space and after line
+        breaks.
+    """
+    sentences_offsets = []
+
+    find_line_break = False
+    for i, (tok, space) in enumerate(zip(tokens, spaces)):
+        if tok in '.!?' and space:
+            sentences_offsets.append(i + 1)
+        elif tok == '\n':
+            find_line_break = True
+        elif find_line_break:
+            sentences_offsets.append(i)
+            find_line_break = False
+
+    return sentences_offsets
@@ -0,0 +1,19 @@
+"""
+    Generated by `python -m birchnlp.tokenizer.unicode_tables_gen`,
+    do not edit manually.
+"""
+
+
+UNIDATA_VERSION = "14.0.0"
+
+DASH_MARKS = (
+    "-\u058a\u05be\u1400\u1806\u2010\u2011\u2012"
+    "\u2013\u2014\u2015\u2e17\u2e1a\u2e3a\u2e3b\u2e40"
+    "\u2e5d\u301c\u3030\u30a0\ufe31\ufe32\ufe58\ufe63"
+    "\uff0d\U00010ead"
+)
+QUOTATION_MARKS = (
+    "\u00ab\u00bb\u2018\u2019\u201b\u201c\u201d\u201f"
+    "\u2039\u203a\u2e02\u2e03\u2e04\u2e05\u2e09\u2e0a"
+    "\u2e0c\u2e0d\u2e1c\u2e1d\u2e20\u2e21"
+)
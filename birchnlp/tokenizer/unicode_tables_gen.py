@@ -0,0 +1,104 @@
+"""
+    Generates `unicode_tables.py` with character classes, which are too
+    slow to collect by scanning all of Unicode at import time:
+
+        python -m birchnlp.tokenizer.unicode_tables_gen
+"""
+import os
+import sys
+import json
+import warnings
+import unicodedata
+import typing as t
+
+
+TABLES_FILE = os.path.join(os.path.dirname(__file__), 'unicode_tables.py')
+# Tables collected for Unicode databases other than the bundled one
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME',
+                                        os.path.expanduser('~/.cache')),
+                         'birchnlp')
+
+HEADER = '''"""
+    Generated by `python -m birchnlp.tokenizer.unicode_tables_gen`,
+    do not edit manually.
+"""
+'''
+
+
+def collect_tables() -> t.Dict[str, str]:
+    dash_marks, quotation_marks = [], []
+    for i in range(sys.maxunicode):
+        category = unicodedata.category(chr(i))
+        if category == 'Pd':
+            dash_marks.append(chr(i))
+        elif category in ('Pi', 'Pf'):
+            quotation_marks.append(chr(i))
+
+    return {
+        'DASH_MARKS': ''.join(dash_marks),
+        'QUOTATION_MARKS': ''.join(quotation_marks),
+    }
+
+
+def load_tables() -> t.Dict[str, str]:
+    """
+        Tables for Unicode database of running Python, when it differs
+        from the bundled one. They are collected once per database
+        version and then read from user cache directory.
+    """
+    path = os.path.join(CACHE_DIR, 'unicode_tables-%s.json'
+                        % unicodedata.unidata_version)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    warnings.warn("Unicode tables are not generated for Unicode %s, "
+                  "collecting them once into %s"
+                  % (unicodedata.unidata_version, path))
+    tables = collect_tables()
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(tables, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # read-only home, tables will be collected again next time
+
+    return tables
+
+
+CHARS_PER_LINE = 8
+
+
+def escape(char: str) -> str:
+    if char.isascii() and char.isprintable() and char not in '"\\':
+        return char
+    elif ord(char) > 0xffff:
+        return f'\\U{ord(char):08x}'
+    return f'\\u{ord(char):04x}'
+
+
+def render_tables(tables: t.Dict[str, str]) -> str:
+    lines = [HEADER, '',
+             f'UNIDATA_VERSION = "{unicodedata.unidata_version}"', '']
+    for name, chars in tables.items():
+        lines.append(f'{name} = (')
+        for i in range(0, len(chars), CHARS_PER_LINE):
+            escaped = ''.join(map(escape, chars[i: i + CHARS_PER_LINE]))
+            lines.append(f'    "{escaped}"')
+        lines.append(')')
+
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    with open(TABLES_FILE, 'w') as f:
+        f.write(render_tables(collect_tables()))
+
+
+if __name__ == '__main__':
+    main()
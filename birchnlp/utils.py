@@ -1,5 +1,131 @@
+import typing as t
+import threading
+from collections import OrderedDict
+
+import xxhash
 import Stemmer as stemmer
 
 
+STEMS_CACHE_SIZE = 100000
+# Texts may contain lone surrogates, which are valid Python strings
+ENCODING_ERRORS = "surrogatepass"
+
+CacheInfo = t.NamedTuple("CacheInfo", [('hits', int), ('misses', int),
+                                       ('maxsize', int), ('size', int)])
+
+
+def get_fingerprint(*parts: bytes) -> int:
+    """
+        Stable 64-bit content hash, same in every process.
+    """
+    fingerprint = xxhash.xxh64()
+    for part in parts:
+        fingerprint.update(part)
+
+    return fingerprint.intdigest()
+
+
+def get_str_fingerprint(text: str) -> int:
+    return get_fingerprint(text.encode("utf-8", ENCODING_ERRORS))
+
+
 def get_stem_func():
     return stemmer.Stemmer('russian').stemWord
+
+
+class LRUCache:
+    """
+        Size-bounded mapping, which evicts least recently used keys
+        and counts lookup hits and misses. Safe to share between threads.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # locks can't be pickled, unpickled object gets a new one
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __setitem__(self, key, value):
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self))
+
+
+class CachedStemmer:
+    """
+        Russian stemmer with size-bounded cache of stems, shared by
+        documents and tagger to stem each word form once.
+    """
+
+    def __init__(self, cache_size: int=STEMS_CACHE_SIZE):
+        self._stemmer = stemmer.Stemmer('russian')
+        self.cache = LRUCache(cache_size)
+        self.version = "russian-%s" % stemmer.version()
+
+    def __call__(self, word: str) -> str:
+        stem = self.cache.get(word)
+        if stem is None:
+            stem = self._stemmer.stemWord(word)
+            self.cache[word] = stem
+
+        return stem
+
+    def stem_words(self, words: t.List[str]) -> t.List[str]:
+        """
+            Stem words, passing uncached ones to stemmer in one batch.
+        """
+        stems = [self.cache.get(word) for word in words]
+
+        missing = list(dict.fromkeys(word for word, stem in zip(words, stems)
+                                     if stem is None))
+        if missing:
+            new_stems = dict(zip(missing, self._stemmer.stemWords(missing)))
+            for word, stem in new_stems.items():
+                self.cache[word] = stem
+            stems = [new_stems[word] if stem is None else stem
+                     for word, stem in zip(words, stems)]
+
+        return stems
@@ -13,6 +13,6 @@ setup(
     version="0.1.0",
     description="NLP swiss army knife for russian language",
     install_requires=requirements,
-    packages=find_packages('.', exclude='tests'),
+    packages=find_packages('.', exclude=('tests', 'benchmarks')),
     include_package_data=True,
 )
@@ -1,4 +1,12 @@
+import os
+import sys
+import pickle
+import subprocess
+
+import birchnlp
+from birchnlp import models
 from birchnlp.birch import Birch
+from birchnlp.utils import CachedStemmer
 
 
 def test_birch():
@@ -18,3 +26,169 @@ def test_birch():
 
     assert doc.bounds == (0, 307)
     assert doc[2:5].bounds == (8, 30)
+
+
+def test_from_texts():
+    texts = ["Фейнман прочитал курс лекций.",
+             "",
+             "Университет понимал, что лекции станут историческим событием."]
+
+    docs = list(Birch.from_texts(texts, batch_size=2))
+
+    assert len(docs) == len(texts)
+    for doc, text in zip(docs, texts):
+        expected = Birch(text)
+        assert [tok.pos for tok in doc] == [tok.pos for tok in expected]
+        assert [tok.stem for tok in doc] == [tok.stem for tok in expected]
+        assert doc.sentences_offsets_ == expected.sentences_offsets_
+
+
+def test_lazy_models():
+    code = ("from birchnlp import models; "
+            "from birchnlp.birch import Birch; "
+            "Birch('Пора умирать.', tagger=None); "
+            "assert not models.is_loaded(models.TAGGER)")
+    subprocess.check_call([sys.executable, '-c', code])
+
+
+def test_models_load_hook():
+    loaded = []
+    models.set_load_hook(lambda name, seconds: loaded.append(name))
+    models.register(models.STEMMER, CachedStemmer)
+    try:
+        Birch('Пора умирать.', tagger=None)
+        Birch('Пора умирать.', tagger=None)
+    finally:
+        models.set_load_hook(None)
+
+    assert loaded == [models.STEMMER]
+
+
+def test_slices_are_views():
+    doc = Birch("Фейнман согласился прочитать свой курс ровно один раз.",
+                tagger=None)
+    part = doc[2:5]
+
+    assert part.storage_ is doc.storage_
+    assert [repr(tok) for tok in part] == [repr(tok)
+                                           for tok in doc.tokens[2:5]]
+    assert part[-1].token == "курс"
+    assert part[1:][0].token == "свой"
+
+    copy = Birch.build_from_tokens(doc.tokens[2:5])
+    assert str(copy) == str(part)
+    assert copy.bounds == part.bounds
+    assert [tok.token for tok in doc[::3]] == ["Фейнман", "свой", "один"]
+    # tokens keep their positions in the document
+    assert [tok.tok_pos for tok in doc[::3]] == [0, 3, 6]
+    assert [tok.tok_pos for tok in doc[::3][1:]] == [3, 6]
+    assert [tok.tok_pos for tok in copy] == [2, 3, 4]
+
+
+def test_pipe():
+    texts = ["Фейнман прочитал курс лекций.",
+             "",
+             "Университет понимал, что лекции станут историческим событием.",
+             "Пора умирать."] * 5
+
+    docs = list(birchnlp.pipe(texts, n_workers=2, chunk_size=3))
+
+    assert len(docs) == len(texts)
+    for doc, text in zip(docs, texts):
+        expected = Birch(text)
+        assert [repr(tok) for tok in doc] == [repr(tok) for tok in expected]
+        assert doc.sentences_offsets_ == expected.sentences_offsets_
+        assert doc.to_bytes() == expected.to_bytes()
+
+
+def test_offsets():
+    text = "  Пора\tумирать.   Штурмовые  корабли\n\nв огне "
+    doc = Birch(text, tagger=None)
+
+    assert [tok.token for tok in doc] == ["Пора", "умирать", ".",
+                                          "Штурмовые", "корабли",
+                                          "\n", "\n", "в", "огне"]
+    assert all(text[tok.start: tok.end] == tok.token for tok in doc)
+    assert doc[3:5].bounds == (18, 36)
+
+
+def test_shared_stemming():
+    stemmer = models.get_stemmer()
+    tagger = models.get_tagger()
+    assert tagger.stemmer is stemmer
+
+    text = "Фейнман согласился прочитать свой курс ровно один раз."
+    doc = Birch(text)
+    expected = Birch(text, stemmer=CachedStemmer())
+
+    assert [tok.stem for tok in doc] == [tok.stem for tok in expected]
+    assert [tok.pos for tok in doc] == [tok.pos for tok in expected]
+
+
+def test_serialization(tmp_path):
+    doc = Birch("Фейнман согласился  прочитать свой курс ровно один раз. "
+                "Университет понимал, что лекции станут историческим "
+                "событием.")
+
+    for part in (doc, doc[3:12], doc[::2], Birch('')):
+        loaded = Birch.from_bytes(part.to_bytes())
+        assert [repr(tok) for tok in loaded] == [repr(tok) for tok in part]
+        assert [tok.tok_pos for tok in loaded] == [tok.tok_pos
+                                                   for tok in part]
+        assert str(loaded) == str(part)
+
+    path = str(tmp_path / "doc.birch")
+    doc.save(path)
+    loaded = Birch.load(path)
+    assert loaded.sentences_offsets_ == doc.sentences_offsets_
+    assert [repr(tok) for tok in loaded] == [repr(tok) for tok in doc]
+    assert not loaded.storage_.starts.flags.owndata
+
+    assert str(pickle.loads(pickle.dumps(doc[3:12]))) == str(doc[3:12])
+
+
+def test_sentence_index():
+    text = ("Фейнман согласился прочитать свой курс. Ровно один раз!\n"
+            "Университет понимал, что лекции станут историческим событием.")
+    doc = Birch(text, tagger=None)
+
+    assert doc.sentences_count() == 3
+    assert [str(sent) for sent in doc.sentences] == [
+        str(doc.sentence(i)) for i in range(3)]
+    assert str(doc.sentence(-2)) == "Ровно один раз!\n"
+    assert doc.sentence(1).storage_ is doc.storage_
+
+    assert doc.token_sentence(0) == 0
+    assert doc.token_sentence(6) == 1
+    assert doc.char_sentence(text.index("один")) == 1
+    assert doc.char_sentence(text.index("событием")) == 2
+
+    part = doc[3:9]
+    assert part.sentences_offsets_ == [3]
+    assert [str(sent) for sent in part.sentences] == ["свой курс. ",
+                                                      "Ровно один раз"]
+    assert part.token_sentence(4) == 1
+
+    copy = doc[::2]
+    assert copy.sentences_count() == len(list(copy.sentences))
+
+
+def test_fingerprint():
+    text = "Фейнман прочитал курс. Фейнман прочитал курс."
+    doc = Birch(text, tagger=None)
+    first, second = doc.sentences
+
+    assert first == second and not first != second
+    assert first.fingerprint == second.fingerprint
+    assert hash(first) == hash(second)
+    assert doc[0].fingerprint == doc[4].fingerprint
+    assert first != doc[0:2] and first != doc[1:4]
+    assert Birch.build_from_tokens(doc.tokens[:4]) == first
+    assert len({first, second, doc}) == 2
+
+    code = ("from birchnlp.birch import Birch; "
+            f"print(Birch({text!r}, tagger=None).fingerprint)")
+    output = subprocess.check_output([sys.executable, '-c', code],
+                                     env={**os.environ,
+                                          'PYTHONHASHSEED': '1'})
+    assert int(output) == doc.fingerprint
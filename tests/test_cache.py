@@ -0,0 +1,63 @@
+import re
+
+from birchnlp.birch import Birch
+from birchnlp.cache import AnalysisCache
+from birchnlp.tokenizer.config import TokenizingConfig
+
+
+class NoPunctTokenizingConfig(TokenizingConfig):
+    SKIP_TOKENS_RE = re.compile(r"^\W$")
+
+
+TEXTS = ["Фейнман прочитал курс лекций.",
+         "Университет понимал, что  лекции станут историческим событием."]
+
+
+def test_analysis_cache(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache.db"))
+
+    docs = [Birch(text, cache=cache) for text in TEXTS]
+    assert cache.info().hits == 0
+    assert len(cache) == 2
+
+    changes = cache._conn.total_changes
+    cached = list(Birch.from_texts(TEXTS + [TEXTS[0]], cache=cache))
+    assert cache.info().hits == 3
+    assert len(cache) == 2
+    for doc, cached_doc in zip(docs + docs[:1], cached):
+        assert [repr(tok) for tok in doc] == [repr(tok) for tok in cached_doc]
+        assert doc.sentences_offsets_ == cached_doc.sentences_offsets_
+    # recently used records are not rewritten on hits
+    assert cache._conn.total_changes == changes
+
+    # other tokenizer config or models make other keys
+    Birch(TEXTS[0], tagger=None, cache=cache)
+    Birch(TEXTS[0], tok_config=NoPunctTokenizingConfig(), cache=cache)
+    assert cache.info().hits == 3
+    assert len(cache) == 4
+
+    assert cache.size() == cache._conn.execute(
+        "SELECT SUM(size) FROM records").fetchone()[0]
+
+    reopened = AnalysisCache(cache.path)
+    assert str(Birch(TEXTS[1], cache=reopened)) == str(docs[1])
+    assert reopened.info().hits == 1
+    assert reopened.size() == cache.size()
+
+
+def test_analysis_cache_eviction(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache.db"), used_update_interval=0)
+    Birch(TEXTS[0], cache=cache)
+    Birch(TEXTS[1], cache=cache)
+    cache.max_bytes = cache.size() + 100
+
+    Birch(TEXTS[0], cache=cache)
+    assert cache.info().hits == 1
+    # the second text is least recently used, so it is evicted
+    Birch(TEXTS[0] * 2, cache=cache)
+    assert len(cache) == 2
+    assert cache.size() <= cache.max_bytes
+
+    Birch(TEXTS[0], cache=cache)
+    Birch(TEXTS[1], cache=cache)
+    assert cache.info().hits == 2
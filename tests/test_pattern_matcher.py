@@ -0,0 +1,183 @@
+import pickle
+import random
+import threading
+import typing as t
+
+import pytest
+
+from birchnlp.pattern_matcher import (
+    PatternMatcher, PatternSet, compile_pattern, patterns_cache)
+from birchnlp.pattern_matcher.schemes import State
+from birchnlp.pos_tagger import POSTag
+from birchnlp.schemes import Token
+
+
+NP_REGEX = ("(<DET>)?"
+            "((<PART>? <ADJ> (<CCONJ> | <SCONJ>)?)* <ADJ>)?"
+            "(<NOUN> | <PROPN>)+ <NUM>?")
+BIG_NP_REGEX = f"({NP_REGEX} (<ADP>|<SCONJ>|<CCONJ>))* {NP_REGEX}"
+
+PATTERNS = [BIG_NP_REGEX, "<ADJ>*<NOUN>+", "<VERB> . <NOUN>?",
+            '<ADJ>* "[Pp]ython" <NOUN>*']
+TAGS = [POSTag.DET, POSTag.PART, POSTag.ADJ, POSTag.CCONJ, POSTag.SCONJ,
+        POSTag.NOUN, POSTag.PROPN, POSTag.NUM, POSTag.ADP, POSTag.VERB, None]
+
+
+def random_tokens(rng: random.Random, size: int):
+    return [Token(rng.choice(['python', 'слово']), rng.choice(TAGS),
+                  '', True, 0, i)
+            for i in range(size)]
+
+
+def addstate(state: State, states: t.Set[State]):
+    if state in states:
+        return
+    states.add(state)
+    for eps in state.epsilon:
+        addstate(eps, states)
+
+
+def nfa_best_match(matcher: PatternMatcher, words: t.List[Token]) -> int:
+    """
+        Reference longest match, found by simulating matcher's NFA.
+    """
+    best_match = 0
+
+    current_states = set()
+    addstate(matcher.start_state, current_states)
+
+    for token_ind, token in enumerate(words):
+        next_states = set()
+        for state in current_states:
+            for trans in state.transitions:
+                if trans.is_correct_token(token):
+                    addstate(state.transitions[trans], next_states)
+
+        if not next_states:
+            break
+        current_states = next_states
+
+        if any(state.is_end for state in current_states):
+            best_match = token_ind + 1
+
+    return best_match
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_dfa_matches_nfa(pattern):
+    matcher = PatternMatcher(pattern)
+
+    rng = random.Random(13)
+    for _ in range(200):
+        tokens = random_tokens(rng, rng.randint(0, 20))
+        assert (matcher.extract_best_match(tokens) ==
+                nfa_best_match(matcher, tokens))
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_findall(pattern):
+    matcher = PatternMatcher(pattern)
+
+    rng = random.Random(7)
+    for _ in range(100):
+        tokens = random_tokens(rng, rng.randint(0, 40))
+        lengths = [nfa_best_match(matcher, tokens[start:])
+                   for start in range(len(tokens))]
+
+        assert matcher.findall(tokens) == [
+            (start, start + length)
+            for start, length in enumerate(lengths) if length]
+
+        coords = matcher.findall(tokens, overlapping=False)
+        counter = 0
+        for start, fin in coords:
+            assert not any(lengths[counter: start])
+            assert fin == start + lengths[start]
+            counter = fin
+        assert not any(lengths[counter:])
+
+
+def test_findall_long_text():
+    tokens = [Token('слово', POSTag.NOUN, '', True, 0, i)
+              for i in range(100000)]
+
+    coords = PatternMatcher("<ADJ>*<NOUN>+").findall(tokens)
+    assert coords == [(i, len(tokens)) for i in range(len(tokens))]
+
+
+def test_compile_pattern():
+    patterns_cache.clear()
+
+    matcher = compile_pattern("<ADJ>*<NOUN>+")
+    assert compile_pattern("<ADJ>*<NOUN>+") is matcher
+    assert compile_pattern("<NOUN>") is not matcher
+
+    info = patterns_cache.info()
+    assert (info.hits, info.misses, info.size) == (1, 2, 2)
+
+    patterns_cache.clear()
+    assert len(patterns_cache) == 0
+    assert compile_pattern("<ADJ>*<NOUN>+") is not matcher
+
+
+def test_compile_pattern_threads():
+    tokens = random_tokens(random.Random(5), 300)
+    expected = [PatternMatcher(pattern).findall(tokens)
+                for pattern in PATTERNS]
+
+    # tiny cache makes threads evict each other's matchers
+    maxsize = patterns_cache.maxsize
+    patterns_cache.maxsize = 1
+    patterns_cache.clear()
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(50):
+                for pattern, coords in zip(PATTERNS, expected):
+                    assert compile_pattern(pattern).findall(tokens) == coords
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    patterns_cache.maxsize = maxsize
+    patterns_cache.clear()
+    assert not errors
+
+
+@pytest.mark.parametrize("overlapping", [True, False])
+def test_pattern_set(overlapping):
+    patterns = {str(i): pattern for i, pattern in enumerate(PATTERNS)}
+    pattern_set = PatternSet(patterns)
+    matchers = {name: PatternMatcher(pattern)
+                for name, pattern in patterns.items()}
+
+    rng = random.Random(5)
+    for _ in range(100):
+        tokens = random_tokens(rng, rng.randint(0, 40))
+
+        expected = sorted(
+            (start, name, fin)
+            for name, matcher in matchers.items()
+            for start, fin in matcher.findall(tokens, overlapping))
+        assert pattern_set.findall(tokens, overlapping) == [
+            (name, start, fin) for start, name, fin in expected]
+
+
+def test_pickle_matchers():
+    tokens = random_tokens(random.Random(9), 100)
+    matcher = compile_pattern(BIG_NP_REGEX)
+    matcher.findall(tokens)  # fill DFA transitions
+    pattern_set = PatternSet({'np': NP_REGEX, 'verb': "<VERB> . <NOUN>?"})
+
+    loaded = pickle.loads(pickle.dumps(matcher))
+    assert loaded.findall(tokens) == matcher.findall(tokens)
+    loaded = pickle.loads(pickle.dumps(pattern_set))
+    assert loaded.findall(tokens) == pattern_set.findall(tokens)
+    assert pickle.loads(pickle.dumps(patterns_cache)).info() == (
+        patterns_cache.info())
@@ -1,4 +1,8 @@
-from birchnlp.scorer import LiteralScorer
+from collections import Counter
+
+import numpy as np
+
+from birchnlp.scorer import LiteralScorer, CorpusLiteralScorer
 
 
 def test_scorer(habra_article):
@@ -23,3 +27,66 @@ def test_scorer(habra_article):
 def test_on_empty_text():
     scorer = LiteralScorer()
     assert scorer.assign_scores([]) == []
+
+
+def test_vectorized_scorer(habra_article):
+    literals = (habra_article.extract_by_pattern("<ADJ>*<NOUN>+") +
+                habra_article.extract_by_pattern("(<ADJ>|<NOUN>|<VERB>)+"))
+
+    for params in ({}, {'topn': 5}, {'topn': 1000}, {'percentile': 90}):
+        expected = LiteralScorer(vectorized=False,
+                                 **params).assign_scores(literals)
+        scored = LiteralScorer(**params).assign_scores(literals)
+
+        assert [lit for lit, _ in scored] == [lit for lit, _ in expected]
+        assert [sc for _, sc in scored] == [sc for _, sc in expected]
+
+
+def test_corpus_scorer(habra_article, tmp_path):
+    literals = (habra_article.extract_by_pattern("<ADJ>*<NOUN>+") +
+                habra_article.extract_by_pattern("(<ADJ>|<NOUN>|<VERB>)+"))
+    half = len(literals) // 2
+
+    def scores(scored):
+        return [(tuple(tok.stem for tok in lit), sc) for lit, sc in scored]
+
+    expected = LiteralScorer(topn=1000).assign_scores(literals)
+    assert scores(CorpusLiteralScorer(topn=1000).assign_scores(
+        literals)) == scores(expected)
+
+    # literals are scored as if they were added to corpus, up to shift
+    # of scores by the minimal one
+    corpus = CorpusLiteralScorer(topn=1000).partial_fit(literals[:half])
+    expected = dict(scores(expected))
+    shifts = [expected[lit] - sc
+              for lit, sc in scores(corpus.assign_scores(literals[half:]))]
+    assert np.allclose(shifts, shifts[0])
+
+    merged = CorpusLiteralScorer(topn=1000).partial_fit(literals[half:])
+    merged.merge(corpus)
+    fitted = CorpusLiteralScorer(topn=1000).partial_fit(literals)
+    assert scores(merged.assign_scores(literals[:2])) == scores(
+        fitted.assign_scores(literals[:2]))
+
+    path = str(tmp_path / "corpus.npz")
+    fitted.save(path)
+    loaded = CorpusLiteralScorer.load(path, topn=1000)
+    assert scores(loaded.assign_scores(literals)) == scores(
+        fitted.assign_scores(literals))
+
+
+def test_corpus_scorer_edge_cases(habra_article, tmp_path):
+    path = str(tmp_path / "empty.npz")
+    CorpusLiteralScorer().save(path)
+    assert CorpusLiteralScorer.load(path).assign_scores([]) == []
+
+    literals = habra_article.extract_by_pattern("<ADJ>*<NOUN>+")
+    scorer = CorpusLiteralScorer().partial_fit(literals)
+    # single literal is scored against corpus, frequent ones get more
+    counts = Counter(tuple(tok.stem for tok in lit) for lit in literals)
+    frequent = next(lit for lit in literals
+                    if counts[tuple(tok.stem for tok in lit)] > 1)
+    [(literal, score)] = scorer.assign_scores([frequent])
+    assert literal is frequent and score > 0
+    assert CorpusLiteralScorer().assign_scores([frequent]) == [
+        (frequent, 0.)]
@@ -1,3 +1,12 @@
+import tracemalloc
+
+import numpy as np
+
+from birchnlp.birch import Birch
+from birchnlp.pos_tagger import POSTagger, compact
+from birchnlp.pos_tagger.convert_weights import convert_weights
+
+
 def test_tagger(tagger, tokenizer):
     sample_text = ('Секретарша (Петрова-Водкина) ставила '
                    'сургучные- печати на пакет, '
@@ -31,3 +40,92 @@ def test_tagger(tagger, tokenizer):
                                        ('.', 'PUNCT'),
                                        ('.', 'PUNCT'),
                                        ('.', 'PUNCT')]
+
+
+def test_tag_many(tagger, tokenizer):
+    sents = [tokenizer(text)[0] for text in ('Радио играло вальс.',
+                                             '',
+                                             'Посетители ожидали очереди')]
+
+    assert tagger.tag_many(sents) == [tagger.tag(sent) for sent in sents]
+
+
+def test_features_cache(tagger, tokenizer):
+    tokens, _ = tokenizer('Радио играло вальс, радио играло вальс.')
+
+    tags = tagger.tag(tokens)
+    # six distinct words plus start and end paddings, five lookups per token
+    assert tagger.features_cache.info().misses == 8
+    assert tagger.features_cache.info().hits == len(tokens) * 5 - 8
+    # hashes are kept as one compact array per word
+    features = tagger.features_cache.get(tokens[0])
+    assert features.dtype == np.int32 and len(features) == 5
+
+    tagger.features_cache.maxsize = 0
+    tagger.features_cache.clear()
+    assert tagger.tag(tokens) == tags
+    assert len(tagger.features_cache) == 0
+
+
+def test_dense_tagger(tagger, tokenizer):
+    sents = [tokenizer(text)[0] for text in ('Радио играло вальс.',
+                                             'Посетители ожидали очереди')]
+    dense_tagger = POSTagger(dense=True)
+
+    assert np.array_equal(dense_tagger._predict(sents), tagger._predict(sents))
+    assert dense_tagger.tag_many(sents) == tagger.tag_many(sents)
+
+
+def test_precomputed_stems(tagger, tokenizer):
+    tokens, _ = tokenizer('Посетители ожидали своей очереди.')
+    stems = tagger.stemmer.stem_words([tok.lower() for tok in tokens])
+
+    assert tagger.tag(tokens, stems) == POSTagger().tag(tokens)
+    # stems were taken from arguments, so stemmer cache was not used
+    assert tagger.stemmer.cache.info().hits == 0
+
+
+def test_mmap_weights(tagger, tokenizer, tmp_path):
+    convert_weights(out_dir=str(tmp_path))
+    mmap_tagger = POSTagger(data_dir=str(tmp_path))
+
+    # weights are read-only views of mapped files
+    assert not mmap_tagger.coef_.data.flags.writeable
+    assert mmap_tagger.version == tagger.version
+
+    sents = [tokenizer(text)[0] for text in ('Радио играло вальс.',
+                                             'Посетители ожидали очереди')]
+    assert np.array_equal(mmap_tagger._predict(sents), tagger._predict(sents))
+    # only weights rows of features are read, weights are not upcast
+    peak = predict_peak(mmap_tagger, sents)
+    assert peak < mmap_tagger.coef_.data.nbytes / 100
+
+
+def test_compact_weights(tagger, tokenizer, tmp_path):
+    sents = [tokenizer(text)[0] for text in ('Радио играло вальс.',
+                                             'Посетители ожидали очереди')]
+    predictions = tagger._predict(sents)
+
+    for dtype, dense in ((np.int8, False), (np.float16, True)):
+        coef, scale = compact.quantize(compact.prune(tagger.coef_, 1e-3),
+                                       dtype)
+        compact.save_weights(str(tmp_path), coef, scale, tagger.intercept_)
+        small_tagger = POSTagger(data_dir=str(tmp_path), dense=dense)
+
+        assert small_tagger.version != tagger.version
+        assert np.allclose(small_tagger._predict(sents), predictions,
+                           atol=0.05 * np.abs(predictions).max())
+        # quantized weights are gathered and scaled without upcasting
+        assert predict_peak(small_tagger, sents) < coef.data.nbytes / 10
+
+        doc = Birch('Радио играло вальс.', tagger=small_tagger)
+        assert len(doc) == 4 and all(tok.pos is not None for tok in doc)
+
+
+def predict_peak(tagger: POSTagger, sents) -> int:
+    tracemalloc.start()
+    tagger._predict(sents)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak
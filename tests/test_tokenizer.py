@@ -1,3 +1,14 @@
+import io
+import re
+import random
+import unicodedata
+
+import pytest
+
+from birchnlp.tokenizer import (get_tokenizer, iter_tokenize, unicode_tables,
+                                unicode_tables_gen)
+from birchnlp.tokenizer.config import TokenizingConfig
+from birchnlp.tokenizer.unicode_tables_gen import collect_tables
 
 
 def test_tokenize(tokenizer):
@@ -55,3 +66,158 @@ def test_empty_text(tokenizer):
     tokens, spaces = tokenizer('    ')
     assert tokens == []
     assert spaces == []
+
+
+@pytest.mark.skipif(unicode_tables.UNIDATA_VERSION !=
+                    unicodedata.unidata_version,
+                    reason="tables are generated for other Unicode version")
+def test_unicode_tables():
+    tables = collect_tables()
+
+    assert tables['DASH_MARKS'] == unicode_tables.DASH_MARKS
+    assert tables['QUOTATION_MARKS'] == unicode_tables.QUOTATION_MARKS
+
+
+def test_unicode_tables_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(unicode_tables_gen, 'CACHE_DIR', str(tmp_path))
+    with pytest.warns(UserWarning):
+        tables = unicode_tables_gen.load_tables()
+    assert tables == collect_tables()
+
+    def fail():
+        raise AssertionError("tables are collected again")
+
+    monkeypatch.setattr(unicode_tables_gen, 'collect_tables', fail)
+    assert unicode_tables_gen.load_tables() == tables
+
+
+class URLTokenizingConfig(TokenizingConfig):
+    TOKENS_RE = re.compile(r"https?://\S+")
+
+
+@pytest.mark.parametrize("config", [None, URLTokenizingConfig()])
+def test_iter_tokenize(config):
+    text = ('Секретарша (Петрова-Водкина)  ставила печати,\n'
+            'см. https://ru.wikipedia.org/wiki/Печать_(знак) и '
+            '"http://example.com/a?b=c"...   А Вася писал в вк: '
+            '"Как дела?))"  ')
+    tokens, spaces = get_tokenizer(config)(text)
+
+    rng = random.Random(3)
+    for _ in range(50):
+        chunks, start = [], 0
+        while start < len(text):
+            size = rng.randint(1, 20)
+            chunks.append(text[start: start + size])
+            start += size
+
+        triples = list(iter_tokenize(chunks, config))
+        assert [tok for tok, _, _ in triples] == tokens
+        assert [space for _, space, _ in triples] == spaces
+        assert all(text[start: start + len(tok)] == tok
+                   for tok, _, start in triples)
+
+    assert list(iter_tokenize(io.StringIO(text), config)) == triples
+
+
+class FormulaTokenizingConfig(TokenizingConfig):
+    TOKENS_RE = re.compile(r"\$[^$]+\$")
+    TOKENS_START_RE = re.compile(r"\$")
+
+
+def test_special_tokens():
+    sample_text = 'Формула ($a + b$), а не $a + b$! Итог:$c$.'
+
+    tokens, spaces = get_tokenizer(FormulaTokenizingConfig())(sample_text)
+
+    assert tokens == ['Формула', '(', '$a + b$', ')', ',', 'а', 'не',
+                      '$a + b$', '!', 'Итог', ':', '$c$', '.']
+    assert ''.join([f'{t}{" " * int(s)}'
+                   for t, s in zip(tokens, spaces)]) == sample_text
+
+
+def test_iter_tokenize_special_tokens():
+    text = 'Формула $a + b$ и ещё $ c  d $, цена 5$ без скидки.'
+    tokens, spaces = get_tokenizer(FormulaTokenizingConfig())(text)
+
+    for i in range(1, len(text)):
+        triples = list(iter_tokenize([text[:i], text[i:]],
+                                     FormulaTokenizingConfig()))
+        assert [tok for tok, _, _ in triples] == tokens
+        assert [space for _, space, _ in triples] == spaces
+
+    class NoStartTokenizingConfig(FormulaTokenizingConfig):
+        TOKENS_START_RE = None
+
+    with pytest.raises(ValueError):
+        list(iter_tokenize([text], NoStartTokenizingConfig()))
+
+
+class NoPunctTokenizingConfig(TokenizingConfig):
+    SKIP_TOKENS_RE = re.compile(r"^\W$")
+
+
+@pytest.mark.parametrize("config", [TokenizingConfig(),
+                                    NoPunctTokenizingConfig(),
+                                    FormulaTokenizingConfig()])
+def test_iter_tokenize_random(config):
+    parts = ["мир", "а", "\n", " ", "  ", "\t", ",", ".", "$", "-", "(",
+             "?"]
+    rng = random.Random(11)
+    for _ in range(2000):
+        chunks = ["".join(rng.choices(parts, k=rng.randint(0, 4)))
+                  for _ in range(rng.randint(1, 8))]
+        tokens, spaces, spans = get_tokenizer(config)("".join(chunks),
+                                                      with_spans=True)
+
+        assert list(iter_tokenize(chunks, config)) == [
+            (tok, space, start)
+            for tok, space, (start, _) in zip(tokens, spaces, spans)]
+
+
+def test_iter_tokenize_forced_cut():
+    # unmatched special token start holds the buffer, until it is cut
+    # at the last whitespace
+    text = "Цена 5$ " + "длинный текст " * 10
+    chunks = [text[i: i + 4] for i in range(0, len(text), 4)]
+
+    triples = list(iter_tokenize(chunks, FormulaTokenizingConfig(),
+                                 max_buffer_size=32))
+    tokens, spaces = get_tokenizer(FormulaTokenizingConfig())(text)
+    assert [tok for tok, _, _ in triples] == tokens
+    assert [space for _, space, _ in triples] == spaces
+
+
+@pytest.mark.parametrize("config_cls", [TokenizingConfig,
+                                        FormulaTokenizingConfig])
+def test_tokenizing_engines(config_cls):
+    class ChunkTokenizingConfig(config_cls):
+        TOKENIZE_RE = None
+
+    with open("tests/test_data/habrahabr_article.txt") as f:
+        text = f.read()
+    text += (' «(Петрова-Водкина)» — сургучные-... "Как дела?))" -1.5% '
+             '[a+b]\tИтог:$c + d$.\n')
+
+    assert (get_tokenizer(config_cls())(text) ==
+            get_tokenizer(ChunkTokenizingConfig())(text))
+
+
+def test_overridden_affixes():
+    class NoInfixTokenizingConfig(TokenizingConfig):
+        INFIX_RE = re.compile(r"[+]")
+
+    class FastTokenizingConfig(NoInfixTokenizingConfig):
+        TOKENIZE_RE = re.compile(r"\S+")
+
+    class SubFastTokenizingConfig(FastTokenizingConfig):
+        pass
+
+    # regexes, which differ from ones TOKENIZE_RE is built for, disable it
+    assert NoInfixTokenizingConfig.TOKENIZE_RE is None
+    assert FormulaTokenizingConfig.TOKENIZE_RE is TokenizingConfig.TOKENIZE_RE
+    assert (SubFastTokenizingConfig.TOKENIZE_RE is
+            FastTokenizingConfig.TOKENIZE_RE)
+
+    tokens, _ = get_tokenizer(NoInfixTokenizingConfig())("a=b a+b")
+    assert tokens == ["a=b", "a", "+", "b"]